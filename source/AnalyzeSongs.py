@@ -0,0 +1,92 @@
+# Friday Night Funkin' Astral Engine
+
+### Song Analysis
+# Analyzes a whole song library ahead of time, so players never have to wait on it (or pay for it) at runtime.
+# Every song gets a sidecar file next to it (song.ogg -> song.analysis.json) with its BPM, beat grid and per-step energy,
+# which `Conductor.load_audio` picks up instead of analyzing the song itself.
+#
+# Run it from the repo root (just like the game, so the asset paths resolve):
+#   python source/AnalyzeSongs.py [folder] [--estimator librosa|numpy] [--workers N] [--force]
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import os
+import time
+import soundfile
+from BPMAnalysis import ESTIMATORS, analysis_params, read_sidecar, write_sidecar
+
+
+AUDIO_EXTENSIONS: tuple	= (".ogg", ".mp3", ".wav", ".flac")
+MIN_DURATION: float		= 10.0		# Anything shorter is a sound effect, not a song (in seconds)
+
+
+def find_songs(directory: str, params: dict, force: bool = False) -> list[str]:
+	"""
+	Walks a folder for songs that still need a sidecar. Files that can't be read get reported and skipped.
+
+	Args:
+		`directory` (str): The folder to walk (subfolders included).
+		`params` (dict): The analysis parameters the sidecars have to be made with to count as up to date (see `analysis_params`).
+		`force` (bool): Whether songs with an up to date sidecar count too.
+	Returns:
+		`list[str]`: The file paths to the songs.
+	"""
+	songs = []
+	for root, _, files in os.walk(directory):
+		for file in sorted(files):
+			path = os.path.join(root, file)
+			if not file.lower().endswith(AUDIO_EXTENSIONS):
+				continue
+			try:
+				duration = soundfile.info(path).duration
+			except (RuntimeError, OSError) as e:		# (libsndfile errors are RuntimeErrors)
+				print(f"  {path}: skipped, can't read it ({e})")
+				continue
+			if duration < MIN_DURATION:
+				continue
+			if force or read_sidecar(path, params) == None:
+				songs.append(path)
+	return songs
+
+
+def analyze_library(songs: list[str], params: dict, workers: int | None = None) -> int:
+	"""
+	Analyzes songs across worker processes (one per CPU core by default) and writes their sidecars.
+
+	Args:
+		`songs` (list[str]): The file paths to the songs.
+		`params` (dict): The analysis parameters (see `analysis_params`).
+		`workers` (int | None): How many processes to use.
+	Returns:
+		`int`: How many songs got analyzed (the rest failed, and say why).
+	"""
+	done = 0
+	with ProcessPoolExecutor(max_workers = workers) as pool:
+		futures = {pool.submit(write_sidecar, song, params): song for song in songs}
+		for future in as_completed(futures):
+			song = futures[future]
+			try:
+				analysis = future.result()
+			except Exception as e:
+				print(f"  {song}: failed ({e})")
+				continue
+			done += 1
+			print(f"  {song}: {analysis['bpm']:.2f} BPM, {len(analysis['beat_times'])} beats")
+	return done
+
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Writes the analysis sidecars of a whole song library")
+	parser.add_argument("directory", nargs = "?", default = "assets/sounds", help = "The folder to analyze (default: assets/sounds)")
+	parser.add_argument("--estimator", choices = sorted(ESTIMATORS), help = "How to analyze the songs (default: $ASTRAL_BPM_ESTIMATOR, or librosa)")
+	parser.add_argument("--workers", type = int, help = "How many processes to use (default: one per CPU core)")
+	parser.add_argument("--force", action = "store_true", help = "Analyze songs that already have an up to date sidecar too")
+	args = parser.parse_args()
+
+	params = analysis_params(args.estimator)
+	songs = find_songs(args.directory, params, args.force)
+	print(f"Analyzing {len(songs)} songs in {args.directory}")
+	start = time.perf_counter()
+	done = analyze_library(songs, params, args.workers)
+	print(f"Wrote {done} sidecars in {time.perf_counter() - start:.1f} s")
@@ -7,39 +7,324 @@
 import arcade as arc
 from xml.etree import ElementTree as ET
 from PIL import Image, ImageEnhance
+import numpy as np
+from collections.abc import Sequence
+from collections import OrderedDict
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+import threading
+import io
+import os
+import time
+from TextureCache import TextureCache
+from AssetPack import AssetPack
+from SpritePacker import SpritePacker
+
+
+
+###============ File Utility ============###
+
+def open_image(image_path: str) -> Image.Image:
+	"""
+	Opens an image from the mounted asset archive, or from the loose file if it isn't packed.
+	"""
+	packed = AssetPack.read(image_path)
+	if packed != None:
+		return Image.open(io.BytesIO(packed))
+	return Image.open(image_path)
+
+
+def file_mtimes(paths) -> dict[str, int | None]:
+	"""
+	Returns the modification time of every file in `paths` (None for files that don't exist).
+	"""
+	mtimes = {}
+	for path in paths:
+		try:
+			mtimes[path] = os.stat(path).st_mtime_ns
+		except FileNotFoundError:
+			mtimes[path] = None
+	return mtimes
 
 
 
 ###============ XML Atlas Utility ============###
-def load_xml_atlas(xml_file: str, image_file: str):
-	# Load the XML
-	tree = ET.parse(xml_file)
-	root = tree.getroot()
+def parse_xml_atlas(xml_file: str) -> tuple[list[str], list[tuple[int, int, int, int]], array]:
+	"""
+	Parses a Sparrow XML atlas into its frame index, without touching the image sheet.
 
-	# Load image sheet
-	atlas_img = Image.open(image_file)
-	
-	textures = []
+	Args:
+		`xml_file` (str): The file path to the XML atlas.
+	Returns:
+		`tuple[list[str], list[tuple[int, int, int, int]], array]`: The frame names, their `(x, y, width, height)` source rectangles
+		and their untrimmed frames (`frameX, frameY, frameWidth, frameHeight` for every frame, back to back).
+	"""
+	root = ET.parse(xml_file).getroot()
 
+	names = []
+	rects = []
+	frames = array("i")
 	for sub in root.findall("SubTexture"):
-		name = sub.attrib["name"]
-		x = int(sub.attrib["x"])
-		y = int(sub.attrib["y"])
-		w = int(sub.attrib["width"])
-		h = int(sub.attrib["height"])
+		names.append(sub.attrib["name"])
+		x, y, w, h = int(sub.attrib["x"]), int(sub.attrib["y"]), int(sub.attrib["width"]), int(sub.attrib["height"])
+		rects.append((x, y, w, h))
+		# Frames that weren't trimmed don't have the frame attributes
+		frames.extend((int(sub.attrib.get("frameX", 0)), int(sub.attrib.get("frameY", 0)),
+					   int(sub.attrib.get("frameWidth", w)), int(sub.attrib.get("frameHeight", h))))
+	return names, rects, frames
+
+
+def frame_offsets(rects: list[tuple[int, int, int, int]], frames: array, scale: float = 1.0) -> array:
+	"""
+	Computes where each trimmed frame has to be drawn relative to the center of its untrimmed frame, so animations don't jitter.
+
+	Args:
+		`rects` (list[tuple[int, int, int, int]]): The `(x, y, width, height)` source rectangles of the (trimmed) frames.
+		`frames` (array): The untrimmed frames, as returned by `parse_xml_atlas`.
+		`scale` (float): The scale the frames are drawn at.
+	Returns:
+		`array`: The `x, y` offset of every frame, back to back (y goes up, like in arcade).
+	"""
+	offsets = array("f")
+	for i, (_, _, w, h) in enumerate(rects):
+		frame_x, frame_y, frame_w, frame_h = frames[4 * i : 4 * i + 4]
+		# The trimmed image sits at (-frameX, -frameY) inside the untrimmed frame (with y going down)
+		offsets.append(((w - frame_w) / 2 - frame_x) * scale)
+		offsets.append((frame_y + (frame_h - h) / 2) * scale)
+	return offsets
+
+
+def load_xml_atlas(xml_file: str, image_file: str, transforms: tuple = (), workers: int | None = None):
+	# Slice every frame of the lazy atlas right away
+	return LazyAtlas.from_xml(xml_file, image_file, transforms).slice_all(workers)
+
+
+
+###============ Sheet Transforms ============###
+
+def transform_sheet(sheet: Image.Image, transforms: tuple) -> Image.Image:
+	"""
+	Applies a whole transform chain (see `ImageAsset.transform_chain`) to a whole image/spritesheet in one go. \n
+	Scaling is done with a single PIL resize, and all the color work (brightness, tint and premultiplied alpha) is folded
+	into a single pass over the sheet (a lookup table, or NumPy when premultiplying, since that depends on alpha).
+
+	Args:
+		`sheet` (Image.Image): The image to transform.
+		`transforms` (tuple): The transform chain, as `(name, value)` pairs.
+	Returns:
+		`Image.Image`: The transformed RGBA image.
+	"""
+	if sheet.mode != "RGBA":
+		sheet = sheet.convert("RGBA")	# (RGBA sheets skip it, converting them would copy the whole sheet for nothing)
+	options = dict(transforms)
+
+	scale = options.get("scale", 1.0)
+	if scale != 1.0:
+		sheet = sheet.resize((int(sheet.width * scale), int(sheet.height * scale)))
+
+	# Brightness and tint are both per-channel multipliers, so they collapse into one factor per channel
+	factor = np.full(3, options.get("brightness", 1.0), dtype = np.float32)
+	if "tint" in options:
+		factor *= np.asarray(options["tint"][:3], dtype = np.float32) / 255.0
+	premultiply = options.get("premultiply", False)
+	if np.all(factor == 1.0) and not premultiply:
+		return sheet
+
+	if not premultiply:
+		# A per-channel multiplier is just a lookup table, which PIL runs way faster than NumPy can do the math
+		levels = np.arange(256, dtype = np.float32)
+		lut = np.clip(levels[None, :] * factor[:, None] + 0.5, 0, 255).astype(np.uint8)		# (+0.5 so it rounds instead of truncating)
+		return sheet.point(lut.ravel().tolist() + list(range(256)))
+
+	pixels = np.array(sheet)
+	rgb = pixels[..., :3].astype(np.float32)
+	rgb *= factor
+	rgb *= pixels[..., 3:4].astype(np.float32) / 255.0
+	np.clip(rgb + 0.5, 0, 255, out = rgb)		# (+0.5 so it rounds instead of truncating)
+	pixels[..., :3] = rgb
+	return Image.fromarray(pixels, "RGBA")
+
+
+
+###============ Lazy Atlas Class ============###
+
+class LazyAtlas(Sequence):
+	"""
+	A read-only list of atlas frames that are only cropped and converted when they're first accessed. \n
+	Indexing works just like a `list[arc.Texture]` (`atlas[i]`, `len(atlas)`, iteration), so it can be used as an `ImageAsset`'s texture.
+	Attributes:
+		`names` (list[str]): The name of each frame.
+		`rects` (list[tuple[int, int, int, int]]): The `(x, y, width, height)` source rectangle of each frame.
+		`frames` (array | None): The untrimmed frame of each frame (see `parse_xml_atlas`).
+		`slice_workers` (int | None): How many threads `slice_all` uses by default (None -> one per CPU core).
+	"""
+	slice_workers: int | None = None
+
+	def __init__(self, names: list[str], rects: list[tuple[int, int, int, int]], make_region, frames: array = None, load_sheet = None) -> None:
+		self.names = names
+		self.rects = rects
+		self.frames = frames
+		# (name, rect) -> arc.Texture, or (name, rect, sheet) -> arc.Texture for atlases that slice out of a `load_sheet()` sheet
+		self._make_region = make_region
+		# Sparrow atlases love repeating the exact same rectangle for held frames, so key every region by its
+		# source rectangle and only make it once. Frames pointing at the same region share the same texture.
+		self._regions: dict[tuple[int, int, int, int], arc.Texture] = {}
+		# The decoded sheet only stays around until every region has been sliced out of it (see `pinned_bytes`)
+		self._load_sheet = load_sheet
+		self._sheet: Image.Image = None
+		self._region_count = len(set(rects))
+		self._base: LazyAtlas = None		# The atlas this one got mapped from (see `map`)
+
+	@staticmethod
+	def from_xml(xml_file: str, image_file: str, transforms: tuple = ()) -> "LazyAtlas":
+		"""
+		Creates a lazy atlas from a spritesheet and its XML. Only the XML is parsed here, the sheet is opened on the first frame access. \n
+		Color-only transform chains run over the whole sheet once. Chains that scale run on every frame on its own (in a single pass
+		per frame), since frames cropped out of a scaled sheet would land off the pixel grid.
+
+		Args:
+			`xml_file` (str): The file path to the XML atlas.
+			`image_file` (str): The file path to the spritesheet.
+			`transforms` (tuple): A transform chain to apply to the frames (see `transform_sheet`).
+		Returns:
+			`LazyAtlas`: The lazy atlas.
+		"""
+		# Packed atlases come with their frame index precompiled
+		names, rects, frames = AssetPack.atlas_index(image_file) or parse_xml_atlas(xml_file)
+		scale = dict(transforms).get("scale", 1.0)
+
+		def load_sheet() -> Image.Image:
+			if scale != 1.0:
+				return open_image(image_file)
+			# Color transforms don't care where frames start, so transform the sheet once instead of every frame on its own
+			return transform_sheet(open_image(image_file), transforms)
+
+		def crop_region(name: str, rect: tuple[int, int, int, int], sheet: Image.Image) -> arc.Texture:
+			x, y, w, h = rect
+			image = sheet.crop((x, y, x + w, y + h))
+			if scale != 1.0:
+				# Frames rarely start on a whole pixel of a scaled sheet, so cropping one out of it would shift the frame by up to
+				# half a pixel (and resample it differently). Run the whole chain on every frame on its own instead, in one pass
+				# (it's just as fast: scaling costs the same per pixel either way, and this way `slice_all` spreads it over its threads)
+				image = transform_sheet(image, transforms)
+			return arc.Texture(name=name, image=image, hit_box_algorithm=ImageAsset.hit_box_algorithm)
+
+		return LazyAtlas(names, rects, crop_region, frames, load_sheet)
+
+	@staticmethod
+	def from_packed(entry: dict, transforms: tuple = ()) -> "LazyAtlas":
+		"""
+		Creates a lazy atlas of an image that got packed into a shared sheet (see `SpritePacker`). \n
+		The shared sheet is decoded once for every image packed in it, and each frame is transformed on its own after being sliced.
+
+		Args:
+			`entry` (dict): The image's entry in the sheet index (see `SpritePacker.lookup`).
+			`transforms` (tuple): A transform chain to apply to every frame (see `transform_sheet`).
+		Returns:
+			`LazyAtlas`: The lazy atlas.
+		"""
+		def crop_region(name: str, rect: tuple[int, int, int, int], sheet: Image.Image) -> arc.Texture:
+			# The other images in the sheet may want other transforms, so only transform our own frames
+			x, y, w, h = rect
+			return arc.Texture(name=name, image=transform_sheet(sheet.crop((x, y, x + w, y + h)), transforms),
+							   hit_box_algorithm=ImageAsset.hit_box_algorithm)
+
+		return LazyAtlas(entry["names"], [tuple(rect) for rect in entry["rects"]], crop_region, array("i", entry["frames"]),
+						 lambda: SpritePacker.sheet_image(entry["sheet"]))
 
-		# Crop the corresponding region
-		frame = atlas_img.crop((x, y, x + w, y + h)).convert("RGBA")
+	def _slice(self, name: str, rect: tuple[int, int, int, int]) -> arc.Texture:
+		if self._load_sheet == None:
+			return self._make_region(name, rect)
+		if self._sheet == None:
+			self._sheet = self._load_sheet()
+		return self._make_region(name, rect, self._sheet)
 
-		# Convert to arcade texture
-		tex = arc.Texture(
-			name=name,
-			image=frame
-		)
+	def _store(self, rect: tuple[int, int, int, int], tex: arc.Texture) -> arc.Texture:
+		self._regions[rect] = tex
+		if len(self._regions) == self._region_count:
+			self._sheet = None		# Every region got sliced, nothing's ever going to need the sheet again
+		return tex
 
-		textures.append(tex)
+	def _region(self, name: str, rect: tuple[int, int, int, int]) -> arc.Texture:
+		tex = self._regions.get(rect)
+		if tex == None:
+			tex = self._store(rect, self._slice(name, rect))
+		return tex
 
-	return textures
+	@property
+	def pinned_bytes(self) -> int:
+		"""How many bytes of decoded sheet this atlas keeps alive until every region has been sliced (4 bytes per pixel)."""
+		if self._sheet != None:
+			return self._sheet.width * self._sheet.height * 4
+		return self._base.pinned_bytes if self._base != None else 0
+
+	def __len__(self) -> int:
+		return len(self.rects)
+
+	def __getitem__(self, index: int | slice) -> arc.Texture | list[arc.Texture]:
+		if isinstance(index, slice):
+			return [self[i] for i in range(*index.indices(len(self)))]
+		return self._region(self.names[index], self.rects[index])
+
+	def slice_all(self, workers: int | None = None) -> list[arc.Texture]:
+		"""
+		Slices every frame that hasn't been sliced yet, spreading the distinct regions over a pool of threads
+		(PIL lets go of the GIL while cropping and converting). The frames come back in atlas order no matter which thread sliced them.
+
+		Args:
+			`workers` (int | None): How many threads to use (None -> `slice_workers`).
+		Returns:
+			`list[arc.Texture]`: Every frame, in order (just like `list(atlas)`).
+		"""
+		workers = workers or LazyAtlas.slice_workers or os.cpu_count() or 1
+		todo = {rect: name for name, rect in zip(self.names, self.rects) if rect not in self._regions}
+		if workers > 1 and len(todo) > 1:
+			# The first region also opens (and transforms) the sheet, so slice it here before the threads start sharing it
+			rect, name = todo.popitem()
+			self._region(name, rect)
+			with ThreadPoolExecutor(max_workers = min(workers, len(todo)), thread_name_prefix = "AtlasSlicer") as pool:
+				for rect, tex in zip(todo, pool.map(self._slice, todo.values(), todo)):
+					self._store(rect, tex)
+		return [self[i] for i in range(len(self))]
+
+	def materialized(self) -> list[arc.Texture]:
+		"""Returns the distinct textures that have been sliced so far."""
+		return list(self._regions.values())
+
+	def map(self, func) -> "LazyAtlas":
+		"""
+		Returns a new lazy atlas whose frames are `func(frame)`. Nothing gets computed until a frame is accessed.
+
+		Args:
+			`func` (Callable[[arc.Texture], arc.Texture]): The transform to apply to each distinct frame.
+		Returns:
+			`LazyAtlas`: The transformed lazy atlas.
+		"""
+		atlas = LazyAtlas(self.names, self.rects, lambda name, rect: func(self._region(name, rect)), self.frames)
+		atlas._base = self		# (it keeps this one's sheet alive too, until this one is done slicing)
+		return atlas
+
+
+
+def map_unique_textures(textures: list[arc.Texture], func) -> list[arc.Texture]:
+	"""
+	Applies `func` to every *distinct* texture in an atlas frame list, keeping shared frames shared.
+
+	Args:
+		`textures` (list[arc.Texture]): The atlas frames (the same texture object may appear multiple times).
+		`func` (Callable[[arc.Texture], arc.Texture]): The transform to apply.
+	Returns:
+		`list[arc.Texture]`: The transformed frames, in the same order.
+	"""
+	done: dict[int, arc.Texture] = {}
+	result = []
+	for tex in textures:
+		if id(tex) not in done:
+			done[id(tex)] = func(tex)
+		result.append(done[id(tex)])
+	return result
 
 
 
@@ -51,41 +336,99 @@ class ImageAsset:
 	Attributes:
 		`image_path` (str): The file path to the image.
 		`atlas_path` (str | None): The file path to the accompanying XML atlas, if applicable.
-		`texture` (arc.Texture | list[arc.Texture] | None): The loaded texture or list of textures.
+		`texture` (arc.Texture | list[arc.Texture] | LazyAtlas | None): The loaded texture or list of textures.
+		`transforms` (tuple): The transforms applied on top of the source image, as `(name, value)` pairs.
+		`offsets` (array | None): For atlases, where each (trimmed) frame gets drawn relative to its untrimmed frame's center (see `frame_offsets`).
 	"""
+	# How the textures we make get their hit boxes. Our sprites never collide with anything, and arcade's default algorithm walks
+	# the outline pixel by pixel in pure Python (it was ~98% of slicing `gfDanceTitle`, and it holds the GIL), so just use the bounding box.
+	hit_box_algorithm = arc.hitbox.algo_bounding_box
+
 	def __init__(self, image_path: str) -> None:
 		self.image_path = image_path
 		self.atlas_path = None
 		self.texture: arc.Texture | list[arc.Texture] = None
 	
-	def __init__(self, texture: arc.Texture | list[arc.Texture], image_path: str = None, atlas_path: str = None):
+	def __init__(self, texture: arc.Texture | list[arc.Texture] | LazyAtlas, image_path: str = None, atlas_path: str = None, transforms: tuple = (),
+				offsets: array = None):
 		self.image_path = image_path
 		self.atlas_path = atlas_path
 		self.texture = texture
+		self.transforms = transforms	# The transform chain applied on top of the source image, as (name, value) pairs
+		self.offsets = offsets			# x, y draw offset of every atlas frame, back to back
 
 	@staticmethod
-	def load(image_path: str) -> "ImageAsset":
+	def load(image_path: str, lazy: bool = False, scale: float = 1.0, brightness: float = 1.0,
+			tint: tuple[int, int, int] | None = None, premultiply: bool = False) -> "ImageAsset":
 		"""
 		Loads an image asset. If the image is static (no accompanying XML), it loads it as a single texture. \n
-		If the image is dynamic (has accompanying XML), it loads it as a texture atlas.
+		If the image is dynamic (has accompanying XML), it loads it as a texture atlas. \n
+		Images packed into a shared sheet (see `SpritePacker`) are sliced out of it instead of being loaded from their own file. \n
+		The final (transformed) textures are stored in the `TextureCache`, so the next launch can skip decoding and processing them.
 
 		Args:
 			`image_path` (str): The file path to the image.
+			`lazy` (bool): If the image is an atlas, only parse its XML now and slice each frame when it's first accessed.
+			`scale` (float): The scaling factor to apply.
+			`brightness` (float): The brightness factor to apply (after scaling).
+			`tint` (tuple[int, int, int] | None): An RGB color to multiply the image by.
+			`premultiply` (bool): Whether to premultiply the color channels by alpha.
 		
 		Returns:
 			`ImageAsset`: The loaded image asset.
 		"""
+		transforms = ImageAsset.transform_chain(scale = scale, brightness = brightness, tint = tint, premultiply = premultiply)
+		atlas_path = None if ImageAsset.is_static_image(image_path) else image_path.rsplit('.', 1)[0] + '.xml'
+
+		# Lazy atlases only slice the frames they actually need, so they skip the disk cache (storing them would need every frame)
+		if not lazy:
+			cached = TextureCache.read(image_path, transforms)
+			if cached != None:
+				texture, offsets = cached
+				return ImageAsset(texture, image_path, atlas_path, transforms, offsets)
+
+		# If the image got packed into a shared sheet, slice it out of there:
+		packed = SpritePacker.lookup(image_path)
+		if packed != None:
+			atlas = LazyAtlas.from_packed(packed, transforms)
+			if atlas_path == None:
+				texture, offsets = atlas[0], None
+			else:
+				texture = atlas if lazy else atlas.slice_all()
+				offsets = frame_offsets(atlas.rects, atlas.frames, dict(transforms).get("scale", 1.0))
 		# If the image is static, load it as a texture:
-		if ImageAsset.is_static_image(image_path):
-			asset = ImageAsset(image_path)
-			asset.texture = arc.load_texture(image_path)
-			return asset
-		# If the image is dynamic, load it as a texture atlas (load the spritesheet as a PIL image and slice it with the XML data):
+		elif atlas_path == None:
+			offsets = None
+			if transforms or AssetPack.entry(image_path) != None:
+				texture = arc.Texture(transform_sheet(open_image(image_path), transforms), hit_box_algorithm=ImageAsset.hit_box_algorithm)
+			else:
+				texture = arc.load_texture(image_path, hit_box_algorithm=ImageAsset.hit_box_algorithm)
+		# If the image is dynamic, load it as a texture atlas (load the spritesheet as a PIL image, transform it and slice it with the XML data):
 		else:
-			asset = ImageAsset(image_path)
-			asset.atlas_path = image_path.rsplit('.', 1)[0] + '.xml'
-			asset.texture = load_xml_atlas(asset.atlas_path, image_path)
-			return asset
+			atlas = LazyAtlas.from_xml(atlas_path, image_path, transforms)
+			texture = atlas if lazy else atlas.slice_all()
+			# Frames are stored trimmed, so keep track of where to draw them
+			offsets = frame_offsets(atlas.rects, atlas.frames, dict(transforms).get("scale", 1.0))
+
+		asset = ImageAsset(texture, image_path, atlas_path, transforms, offsets)
+		if not lazy:
+			TextureCache.write(image_path, transforms, asset.texture, asset.offsets)
+		return asset
+
+	@staticmethod
+	def transform_chain(scale: float = 1.0, brightness: float = 1.0, tint: tuple[int, int, int] | None = None, premultiply: bool = False) -> tuple:
+		"""
+		Builds the transform chain for the given transform parameters, skipping the ones that wouldn't do anything.
+
+		Returns:
+			`tuple`: The transform chain, as `(name, value)` pairs in the order they're applied.
+		"""
+		chain = []
+		if scale != 1.0:		chain.append(("scale", scale))
+		if brightness != 1.0:	chain.append(("brightness", brightness))
+		if tint != None:		chain.append(("tint", tuple(tint[:3])))
+		if premultiply:			chain.append(("premultiply", True))
+		return tuple(chain)
 	
 	@staticmethod
 	def is_static_image(image_path: str) -> bool:
@@ -97,6 +440,11 @@ class ImageAsset:
 		Returns:
 			`bool`: True if the image is static, False if it has an accompanying XML atlas
 		"""
+		# Packed images already know if they're atlases, no need to touch the filesystem
+		packed = AssetPack.entry(image_path)
+		if packed != None:
+			return "atlas" not in packed
+
 		# If an image 'image.png' is *not* static, then there will exist a file named 'image.xml' in the same directory.
 		xml_path = image_path.rsplit('.', 1)[0] + '.xml'
 		try:
@@ -121,13 +469,82 @@ class ImageAsset:
 		scaled_image = pil_image.resize(new_size)
 
 		# Create a new arcade texture with the scaled image
-		scaled_texture = arc.Texture(image=scaled_image)
+		scaled_texture = arc.Texture(image=scaled_image, hit_box_algorithm=ImageAsset.hit_box_algorithm)
 		return scaled_texture
 	
 
 	#======== Non-Static Members ========#
 	
 
+	def frame_offset(self, index: int) -> tuple[float, float]:
+		"""
+		Returns where an atlas frame has to be drawn relative to the animation's position (always `(0, 0)` for static images).
+
+		Args:
+			`index` (int): The frame index.
+		Returns:
+			`tuple[float, float]`: The x and y offset.
+		"""
+		if self.offsets == None:
+			return 0.0, 0.0
+		if index < 0:
+			index += len(self.offsets) // 2
+		return self.offsets[2 * index], self.offsets[2 * index + 1]
+
+
+	def size_bytes(self) -> int:
+		"""
+		Returns how many bytes the decoded pixels of this image asset take up (4 bytes per pixel, shared frames counted once).
+		Lazy atlases count the sheet they're still slicing out of too (see `LazyAtlas.pinned_bytes`).
+		"""
+		pinned = 0
+		if isinstance(self.texture, arc.Texture):
+			textures = [self.texture]
+		elif isinstance(self.texture, LazyAtlas):
+			textures = self.texture.materialized()
+			pinned = self.texture.pinned_bytes
+		elif self.texture:
+			textures = list({id(tex): tex for tex in self.texture}.values())
+		else:
+			textures = []
+		return sum(tex.width * tex.height * 4 for tex in textures) + pinned
+
+
+	def source_files(self) -> list[str]:
+		"""Returns the files this image asset was loaded from (see `AssetManager.poll_reload`)."""
+		if self.image_path == None:
+			return []
+		return [self.image_path, self.atlas_path or self.image_path.rsplit('.', 1)[0] + '.xml']
+
+
+	def texture_swaps(self, new: "ImageAsset") -> dict[arc.Texture, arc.Texture]:
+		"""
+		Maps every texture of this asset that's been handed out so far to the texture replacing it in `new` (frames are matched by index).
+
+		Args:
+			`new` (ImageAsset): The reloaded image asset.
+		Returns:
+			`dict[arc.Texture, arc.Texture]`: old texture -> new texture.
+		"""
+		def new_frame(index: int) -> arc.Texture:
+			if isinstance(new.texture, arc.Texture):
+				return new.texture
+			return new.texture[min(index, len(new.texture) - 1)]
+
+		if isinstance(self.texture, arc.Texture):
+			old_frames = [self.texture]
+		elif isinstance(self.texture, LazyAtlas):
+			old_frames = [self.texture._regions.get(rect) for rect in self.texture.rects]	# Only the frames that were sliced
+		else:
+			old_frames = self.texture or []
+
+		swaps = {}
+		for i, old in enumerate(old_frames):
+			if old != None and old not in swaps:
+				swaps[old] = new_frame(i)
+		return swaps
+
+
 	def apply_brightness(self, factor: float) -> "ImageAsset":
 		"""
 		Apply the brightness to the image asset's texture(s).
@@ -141,36 +558,101 @@ class ImageAsset:
 			enhancer = ImageEnhance.Brightness(pil_image)
 			brightened_image = enhancer.enhance(factor)
 
-			brightened_texture = arc.Texture(image=brightened_image)
+			brightened_texture = arc.Texture(image=brightened_image, hit_box_algorithm=ImageAsset.hit_box_algorithm)
 		
 		# If it's a dynamic image (texture atlas), adjust the brightness of each texture in the list
 		else:
-			brightened_texture = []   # To prevent appending to None :}
-			for tex in self.texture:
-				pil_image = tex.image
-				enhancer = ImageEnhance.Brightness(pil_image)
-				brightened_image = enhancer.enhance(factor)
-				brightened_texture.append(arc.Texture(image=brightened_image))
+			def brighten(tex: arc.Texture) -> arc.Texture:
+				enhancer = ImageEnhance.Brightness(tex.image)
+				return arc.Texture(image=enhancer.enhance(factor), hit_box_algorithm=ImageAsset.hit_box_algorithm)
+			# Lazy atlases only brighten a frame when it's accessed
+			if isinstance(self.texture, LazyAtlas):
+				brightened_texture = self.texture.map(brighten)
+			# Duplicate frames share a texture, so only brighten each one once
+			else:
+				brightened_texture = map_unique_textures(self.texture, brighten)
 		
-		return ImageAsset(brightened_texture, image_path=self.image_path, atlas_path=self.atlas_path)
+		return ImageAsset(brightened_texture, image_path=self.image_path, atlas_path=self.atlas_path,
+					transforms=self.transforms + (("brightness", factor),), offsets=self.offsets)
 	
 
 	def apply_scale(self, scale: float) -> "ImageAsset":
 		"""
 		Applies a scaling factor to the image asset's texture(s). \n
-		*Warning*: Scales applied with this method are stackable, so be careful not to over-scale or under-scale.
+		This returns a new image asset and leaves this one alone (use `variant` to share the result instead of recomputing it).
 
 		Args:
 			`scale` (float): The scaling factor to apply.
 		"""
+		scaled_texture: list[arc.Texture] | arc.Texture | LazyAtlas = None
 		# If it's a static image, scale the single texture
 		if isinstance(self.texture, arc.Texture):
-			self.texture = ImageAsset.scale_texture(self.texture, scale)
+			scaled_texture = ImageAsset.scale_texture(self.texture, scale)
 		# If it's a dynamic image (texture atlas), scale each texture in the list
 		elif isinstance(self.texture, list):
-			self.texture = [ImageAsset.scale_texture(tex, scale) for tex in self.texture]
+			scaled_texture = map_unique_textures(self.texture, lambda tex: ImageAsset.scale_texture(tex, scale))
+		# If it's a lazy atlas, scale each frame when it gets accessed
+		elif isinstance(self.texture, LazyAtlas):
+			scaled_texture = self.texture.map(lambda tex: ImageAsset.scale_texture(tex, scale))
+
+		# The frame offsets scale along with the frames
+		offsets = self.offsets
+		if offsets != None:
+			offsets = array("f", (offset * scale for offset in offsets))
+
+		return ImageAsset(scaled_texture, image_path=self.image_path, atlas_path=self.atlas_path,
+					transforms=self.transforms + (("scale", scale),), offsets=offsets)
+
+
+	def apply_transforms(self, transforms: tuple) -> "ImageAsset":
+		"""
+		Applies a whole transform chain (see `ImageAsset.transform_chain`) to the image asset's texture(s), in a single pass per texture. \n
+		This returns a new image asset and leaves this one alone.
+
+		Args:
+			`transforms` (tuple): The transform chain, as `(name, value)` pairs.
+		Returns:
+			`ImageAsset`: The transformed image asset.
+		"""
+		def transform(tex: arc.Texture) -> arc.Texture:
+			return arc.Texture(image=transform_sheet(tex.image, transforms), hit_box_algorithm=ImageAsset.hit_box_algorithm)
+
+		if isinstance(self.texture, arc.Texture):
+			transformed_texture = transform(self.texture)
+		elif isinstance(self.texture, LazyAtlas):
+			transformed_texture = self.texture.map(transform)
+		else:
+			transformed_texture = map_unique_textures(self.texture, transform)
+
+		offsets = self.offsets
+		scale = dict(transforms).get("scale", 1.0)
+		if offsets != None and scale != 1.0:
+			offsets = array("f", (offset * scale for offset in offsets))
+
+		return ImageAsset(transformed_texture, image_path=self.image_path, atlas_path=self.atlas_path,
+					transforms=self.transforms + tuple(transforms), offsets=offsets)
+
 
-		return self
+	def variant(self, scale: float = 1.0, brightness: float = 1.0, tint: tuple[int, int, int] | None = None,
+			 premultiply: bool = False) -> "ImageAsset":
+		"""
+		Returns this image asset with extra transforms applied on top of it. This one is left alone, so cached assets can't get
+		scaled twice by accident. \n
+		Variants are interned in the `AssetManager` (see `AssetManager.load_variant`), so asking for the same variant again,
+		from any state, hands back the exact same textures instead of recomputing them.
+
+		Args:
+			`scale` (float): The scaling factor to apply.
+			`brightness` (float): The brightness factor to apply (after scaling).
+			`tint` (tuple[int, int, int] | None): An RGB color to multiply the image by.
+			`premultiply` (bool): Whether to premultiply the color channels by alpha.
+		Returns:
+			`ImageAsset`: The variant (or this very asset if none of the parameters would change anything).
+		"""
+		transforms = ImageAsset.transform_chain(scale = scale, brightness = brightness, tint = tint, premultiply = premultiply)
+		if not transforms:
+			return self
+		return AssetManager.load_variant(self, transforms)
 
 
 
@@ -182,26 +664,46 @@ class SoundAsset:
 	Attributes:
 		`sound_path` (str): The file path to the sound.
 		`sound` (arc.Sound | None): The loaded sound object.
+		`streaming` (bool): Whether the sound is decoded incrementally while it plays instead of all at once.
 	"""
 	def __init__(self, sound_path: str) -> None:
 		self.sound_path = sound_path
 		self.sound: arc.Sound = None
+		self.streaming = False
 
 	@staticmethod
-	def load(sound_path: str) -> "SoundAsset":
+	def load(sound_path: str, streaming: bool = False) -> "SoundAsset":
 		"""
-		Loads a sound asset.
+		Loads a sound asset. \n
+		Long music should be streamed, so only a few buffers of it are ever decoded at once. Keep short sound effects fully decoded though:
+		a streaming sound can only be played by one player at a time.
 
 		Args:
 			`sound_path` (str): The file path to the sound.
+			`streaming` (bool): Whether to decode the sound incrementally while it plays.
 		Returns:
 			`SoundAsset`: The loaded sound asset.
 		"""
 		# Simply load the sound using Arcade's built-in loader
 		asset = SoundAsset(sound_path)
-		asset.sound = arc.load_sound(sound_path)
+		asset.sound = arc.load_sound(sound_path, streaming = streaming)
+		asset.streaming = streaming
 		return asset
 
+	def size_bytes(self) -> int:
+		"""
+		Returns how many bytes the decoded PCM of this sound takes up (streamed sounds only keep a few small buffers around, so they count as 0).
+		"""
+		if self.streaming:
+			return 0
+		source = self.sound.source if self.sound else None
+		if source == None or source.duration == None or source.audio_format == None:
+			return 0
+		return int(source.duration * source.audio_format.bytes_per_second)
+
+	def source_files(self) -> list[str]:
+		return [self.sound_path]
+
 
 
 ###============ Font Asset Class ============###
@@ -227,9 +729,21 @@ class FontAsset:
 			`FontAsset`: The loaded font asset.
 		"""
 		asset = FontAsset(font_path)
-		arc.load_font(font_path)     # Load the font into Arcade's font registry
+		packed = AssetPack.read(font_path)
+		if packed != None:
+			arc.pyglet.font.add_file(io.BytesIO(packed))	# Same as below, but straight from the archive
+		else:
+			arc.load_font(font_path)     # Load the font into Arcade's font registry
 		return asset
 
+	def size_bytes(self) -> int:
+		# The font lives in pyglet's font registry, not here
+		return 0
+
+	def source_files(self) -> list[str]:
+		# Same reason, pyglet can't swap a font that's already been used, so fonts don't get hot-reloaded
+		return []
+
 
 
 ###=========== Text file Asset Class ===========###
@@ -256,10 +770,41 @@ class TextFileAsset:
 			`TextFileAsset`: The loaded text file asset.
 		"""
 		asset = TextFileAsset(file_path)
+		packed = AssetPack.read(file_path)
+		if packed != None:
+			asset.content = bytes(packed).decode('utf-8').replace('\r\n', '\n')	# (text mode would've normalized the newlines too)
+			return asset
 		with open(file_path, 'r', encoding='utf-8') as f:
 			asset.content = f.read()
 		return asset
 
+	def size_bytes(self) -> int:
+		return len(self.content.encode('utf-8')) if self.content else 0
+
+	def source_files(self) -> list[str]:
+		return [self.file_path]
+
+
+
+###============ Asset Stats ============###
+
+@dataclass
+class AssetStats:
+	"""
+	Bookkeeping for a single cached asset (see `AssetManager.stats`).
+	Attributes:
+		`hits` (int): How many requests were served from the cache (or from an already running background load).
+		`misses` (int): How many requests actually had to load the asset.
+		`load_time` (float): The total wall time spent loading the asset, in seconds.
+		`size_bytes` (int): The decoded size of the asset (pixels * 4 for images, PCM size for sounds).
+		`first_scope` (str | None): The scope (usually the state) that first requested the asset.
+	"""
+	hits: int			= 0
+	misses: int			= 0
+	load_time: float	= 0.0
+	size_bytes: int		= 0
+	first_scope: str	= None
+
 
 
 ###============ Asset Manager Class ============###
@@ -272,8 +817,12 @@ class AssetManager:
 		`sounds` (dict[str, SoundAsset]): A dictionary mapping sound names to their corresponding SoundAsset objects.
 		`fonts` (dict[str, FontAsset]):   A dictionary mapping font names to their corresponding FontAsset objects.
 		`text_files` (dict[str, TextFileAsset]): A dictionary mapping text file names to their corresponding TextFileAsset objects.
+		`variants` (dict[str, ImageAsset]): The interned image variants (see `load_variant`).
 	
-	The AssetManager class is responsible for loading assets on demand and caching them for future use to optimize performance.
+	The AssetManager class is responsible for loading assets on demand and caching them for future use to optimize performance. \n
+	Every `load_*` method has a `load_*_async` twin that loads on a thread pool and returns a `Future` resolving to the same cached asset. \n
+	Every load is also tied to the current `scope` (`"global"`, or the name of the state being set up). Assets stay cached while at least
+	one scope holds them, and get evicted once their last scope is released (see `release_scope` and `memory_budget`).
 	"""
 
 	# Make ourselves some little caches because we care about our sweet delicious RAM and performance :D
@@ -281,38 +830,439 @@ class AssetManager:
 	sounds: dict[str, SoundAsset]        = {}
 	fonts: dict[str, FontAsset]          = {}
 	text_files: dict[str, TextFileAsset] = {}
+	variants: dict[str, ImageAsset]      = {}			# Derived image assets (see `ImageAsset.variant`), keyed by base asset + transforms
+	_variant_bases: dict[str, ImageAsset] = {}			# Path-less bases of cached variants, kept alive so their `id()` (in the key) can't get reused
+
+	# Background loading stuff
+	max_workers: int | None = None							# How many loader threads to use (None -> let Python decide)
+	_executor: ThreadPoolExecutor = None
+	_pending: dict[tuple[str, str], Future] = {}			# (cache name, asset name) -> Future, for assets that are still loading
+	_pending_lock = threading.Lock()
+
+	# Asset lifetime stuff
+	scope: str = "global"									# The scope new loads get tied to (the StateManager switches it while setting up states)
+	memory_budget: int | None = None						# How many bytes of assets to keep cached (None -> evict unreferenced assets right away)
+	_scopes: dict[str, set[tuple[str, str]]] = {}			# scope -> (cache name, asset name) of every asset it holds
+	_refcounts: dict[tuple[str, str], int] = {}				# (cache name, asset name) -> how many scopes hold it
+	_recency: OrderedDict[tuple[str, str], None] = OrderedDict()	# Every cached asset, least recently used first
+
+	# Instrumentation stuff (because caring about RAM and performance means measuring it)
+	_stats: dict[tuple[str, str], AssetStats] = {}			# (cache name, asset name) -> its stats
+	_stats_lock = threading.Lock()
+
+	# Hot reload stuff (opt-in with ASTRAL_HOT_RELOAD=1, for iterating on assets without restarting)
+	hot_reload: bool = os.environ.get("ASTRAL_HOT_RELOAD", "0") != "0"
+	reload_interval: float = 0.5							# How often to check the source files for changes, in seconds
+	_reload_elapsed: float = 0.0
+	_loaders: dict[tuple[str, str], tuple] = {}				# (cache name, asset name) -> (loader, args, kwargs) it was loaded with
+	_sources: dict[tuple[str, str], dict[str, int]] = {}	# (cache name, asset name) -> {source file: its mtime when the asset was loaded}
+
+
+	#======== Asset lifetimes ========#
+
+	@classmethod
+	@contextmanager
+	def scoped(cls, scope: str):
+		"""
+		Ties every load inside the `with` block to `scope`.
+
+		Args:
+			`scope` (str): The scope to load into.
+		"""
+		previous_scope = cls.scope
+		cls.scope = scope
+		try:
+			yield
+		finally:
+			cls.scope = previous_scope
+
+
+	@classmethod
+	def _acquire(cls, cache_name: str, name: str) -> None:
+		"""
+		Makes the current scope hold an asset (a scope only ever holds one reference per asset) and marks it as recently used.
+		"""
+		key = (cache_name, name)
+		if key not in cls._stats:
+			cls._stats[key] = AssetStats(first_scope = cls.scope)
+		held = cls._scopes.setdefault(cls.scope, set())
+		if key not in held:
+			held.add(key)
+			cls._refcounts[key] = cls._refcounts.get(key, 0) + 1
+		cls._recency[key] = None
+		cls._recency.move_to_end(key)
+
+
+	@classmethod
+	def release_scope(cls, scope: str) -> None:
+		"""
+		Drops every reference a scope holds, then evicts whatever isn't referenced anymore (see `collect`).
+
+		Args:
+			`scope` (str): The scope to release.
+		"""
+		for key in cls._scopes.pop(scope, ()):
+			cls._refcounts[key] -= 1
+			if cls._refcounts[key] <= 0:
+				del cls._refcounts[key]
+		cls.collect()
+
+
+	@classmethod
+	def memory_usage(cls) -> int:
+		"""
+		Returns:
+			`int`: How many bytes all the cached assets take up.
+		"""
+		return sum(asset.size_bytes() for cache_name, name in cls._recency if (asset := getattr(cls, cache_name).get(name)) != None)
+
+
+	@classmethod
+	def collect(cls) -> None:
+		"""
+		Evicts unreferenced assets. Without a `memory_budget` all of them go right away, otherwise the least recently used ones
+		go until the cache fits the budget (so assets that come back soon don't have to be loaded again).
+		"""
+		unreferenced = [key for key in cls._recency if key not in cls._refcounts and key not in cls._pending]
+		if cls.memory_budget == None:
+			for key in unreferenced:
+				cls._evict(key)
+			return
+
+		usage = cls.memory_usage()
+		for cache_name, name in unreferenced:
+			if usage <= cls.memory_budget:
+				break
+			asset = getattr(cls, cache_name).get(name)
+			usage -= asset.size_bytes() if asset != None else 0
+			cls._evict((cache_name, name))
+
+
+	@classmethod
+	def _evict(cls, key: tuple[str, str]) -> None:
+		cache_name, name = key
+		getattr(cls, cache_name).pop(name, None)
+		if cache_name == "variants":
+			cls._variant_bases.pop(name, None)
+		cls._recency.pop(key, None)
+		cls._loaders.pop(key, None)
+		cls._sources.pop(key, None)
+
+
+	#======== Instrumentation ========#
+
+	@classmethod
+	def _count_hit(cls, key: tuple[str, str]) -> None:
+		with cls._stats_lock:
+			cls._stats.setdefault(key, AssetStats(first_scope = cls.scope)).hits += 1
+
 
 	@classmethod
-	def load_image(cls, name: str, image_path: str = None) -> ImageAsset:
+	def _timed_load(cls, cache_name: str, name: str, loader, *args, **kwargs):
+		"""
+		Runs `loader(*args, **kwargs)` and records it as a cache miss, along with how long it took and how big the result is.
+		"""
+		start = time.perf_counter()
+		asset = loader(*args, **kwargs)
+		elapsed = time.perf_counter() - start
+		if cls.hot_reload:
+			# Remember how to load it again, and what its files looked like (see `poll_reload`)
+			cls._loaders[(cache_name, name)] = (loader, args, kwargs)
+			cls._sources[(cache_name, name)] = file_mtimes(asset.source_files())
+		with cls._stats_lock:
+			stats = cls._stats.setdefault((cache_name, name), AssetStats(first_scope = cls.scope))
+			stats.misses += 1
+			stats.load_time += elapsed
+			stats.size_bytes = asset.size_bytes()
+		return asset
+
+
+	@classmethod
+	def stats(cls) -> dict[str, dict[str, AssetStats]]:
+		"""
+		Returns the stats of every asset ever requested, grouped by cache name (`"images"`, `"sounds"`, `"fonts"`, `"text_files"` and `"variants"`). \n
+		Sizes are refreshed for assets that are still cached (lazy atlases grow as frames get sliced).
+
+		Returns:
+			`dict[str, dict[str, AssetStats]]`: cache name -> asset name -> stats.
+		"""
+		result: dict[str, dict[str, AssetStats]] = {"images": {}, "sounds": {}, "fonts": {}, "text_files": {}, "variants": {}}
+		with cls._stats_lock:
+			for (cache_name, name), stats in cls._stats.items():
+				asset = getattr(cls, cache_name).get(name)
+				if asset != None:
+					stats.size_bytes = asset.size_bytes()
+				result[cache_name][name] = stats
+		return result
+
+
+	@classmethod
+	def totals(cls) -> dict[str, AssetStats]:
+		"""
+		Returns the stats of every asset type, summed up.
+
+		Returns:
+			`dict[str, AssetStats]`: cache name -> total stats (`first_scope` is left empty).
+		"""
+		totals = {}
+		for cache_name, assets in cls.stats().items():
+			total = totals[cache_name] = AssetStats()
+			for stats in assets.values():
+				total.hits       += stats.hits
+				total.misses     += stats.misses
+				total.load_time  += stats.load_time
+				total.size_bytes += stats.size_bytes
+		return totals
+
+
+	@classmethod
+	def dump_stats(cls) -> str:
+		"""
+		Formats the asset stats as a table (slowest loads first), followed by the totals for every asset type.
+
+		Returns:
+			`str`: The stats table.
+		"""
+		lines = [f"{'asset':<40} {'hits':>6} {'misses':>6} {'load ms':>10} {'KiB':>10}  first requested by"]
+		for cache_name, assets in cls.stats().items():
+			for name, stats in sorted(assets.items(), key = lambda item: -item[1].load_time):
+				lines.append(f"{cache_name + ':' + name:<40} {stats.hits:>6} {stats.misses:>6} {stats.load_time * 1000:>10.1f} "
+							 f"{stats.size_bytes / 1024:>10.1f}  {stats.first_scope}")
+		lines.append("")
+		for cache_name, total in cls.totals().items():
+			lines.append(f"{'[total] ' + cache_name:<40} {total.hits:>6} {total.misses:>6} {total.load_time * 1000:>10.1f} "
+						 f"{total.size_bytes / 1024:>10.1f}")
+		return "\n".join(lines)
+
+
+	#======== Hot reloading ========#
+
+	@classmethod
+	def poll_reload(cls, dt: float) -> dict[arc.Texture, arc.Texture]:
+		"""
+		Call this every frame. Every `reload_interval` seconds, it reloads the cached assets whose files changed (see `reload_changed`).
+		Does nothing unless `hot_reload` is on.
+
+		Args:
+			`dt` (float): The time since the last call, in seconds.
+		Returns:
+			`dict[arc.Texture, arc.Texture]`: old texture -> new texture, for every texture that got replaced.
+		"""
+		if not cls.hot_reload:
+			return {}
+		cls._reload_elapsed += dt
+		if cls._reload_elapsed < cls.reload_interval:
+			return {}
+		cls._reload_elapsed = 0.0
+		return cls.reload_changed()
+
+
+	@classmethod
+	def reload_changed(cls) -> dict[arc.Texture, arc.Texture]:
+		"""
+		Reloads every cached asset whose source files changed since it was loaded (only those, so it only takes a few ms). \n
+		The reloaded assets are swapped into the existing asset objects in place, so everything holding them sees the new version.
+		Sprites hold textures rather than assets though, so pass the returned swaps along to `StateManager.swap_textures`.
+
+		Returns:
+			`dict[arc.Texture, arc.Texture]`: old texture -> new texture, for every texture that got replaced.
+		"""
+		changed = []
+		for key, mtimes in list(cls._sources.items()):
+			current = file_mtimes(mtimes)
+			# Files that just went missing are probably mid-save, so wait for them to come back
+			mid_save = any(current[path] == None and mtime != None for path, mtime in mtimes.items())
+			if current != mtimes and not mid_save and getattr(cls, key[0]).get(key[1]) != None:
+				changed.append(key)
+		# Variants are derived from images, so redo them once their base is fresh
+		changed.sort(key = lambda key: key[0] == "variants")
+
+		swaps: dict[arc.Texture, arc.Texture] = {}
+		for cache_name, name in changed:
+			asset = getattr(cls, cache_name)[name]
+			loader, args, kwargs = cls._loaders[(cache_name, name)]
+			try:
+				new_asset = cls._timed_load(cache_name, name, loader, *args, **kwargs)
+			except Exception as e:
+				# Keep the old version, and try again on the next save
+				print(f"Couldn't reload {cache_name}:{name}: {e}")
+				cls._sources[(cache_name, name)] = file_mtimes(cls._sources[(cache_name, name)])
+				continue
+			if isinstance(asset, ImageAsset):
+				swaps.update(asset.texture_swaps(new_asset))
+			vars(asset).update(vars(new_asset))
+			print(f"Reloaded {cache_name}:{name}")
+		return swaps
+
+
+	#======== Background loading ========#
+
+	@classmethod
+	def _load_async(cls, cache_name: str, name: str, loader, *args, **kwargs) -> Future:
+		"""
+		Submits `loader(*args, **kwargs)` to the loader pool and stores its result in the `cache_name` cache under `name`. \n
+		If the asset is already cached or already loading, no new work is submitted.
+		"""
+		cache: dict = getattr(cls, cache_name)
+		key = (cache_name, name)
+		cls._acquire(cache_name, name)
+		with cls._pending_lock:
+			# Already loading? Share the same future
+			future = cls._pending.get(key)
+			if future != None:
+				cls._count_hit(key)
+				return future
+
+			# Already loaded? Hand back a finished future
+			future = Future()
+			if cache.get(name) != None:
+				cls._count_hit(key)
+				future.set_result(cache[name])
+				return future
+
+			if cls._executor == None:
+				cls._executor = ThreadPoolExecutor(max_workers = cls.max_workers, thread_name_prefix = "AssetLoader")
+
+			def load_task():
+				asset = cls._timed_load(cache_name, name, loader, *args, **kwargs)
+				cache[name] = asset		# Cache it *before* the future resolves, so there's never a gap where it's in neither
+				return asset
+
+			future = cls._executor.submit(load_task)
+			cls._pending[key] = future
+		future.add_done_callback(lambda _: cls._pending.pop(key, None))
+		return future
+
+
+	@classmethod
+	def _lookup(cls, cache_name: str, name: str):
+		"""
+		If the asset is currently loading in the background, blocks until it's done and returns it. \n
+		Otherwise returns whatever is cached under `name` (None if it was never loaded). Found assets count as cache hits.
+		"""
+		future = cls._pending.get((cache_name, name))
+		asset = future.result() if future != None else getattr(cls, cache_name).get(name)
+		if asset != None:
+			cls._count_hit((cache_name, name))
+		return asset
+
+
+	@classmethod
+	def load_image_async(cls, name: str, image_path: str = None, lazy: bool = False, scale: float = 1.0, brightness: float = 1.0,
+					  tint: tuple[int, int, int] | None = None, premultiply: bool = False) -> Future:
+		"""
+		Same as `load_image`, but loads the image on the loader pool.
+
+		Returns:
+			`Future[ImageAsset]`: A future resolving to the cached image asset.
+		"""
+		return cls._load_async("images", name, ImageAsset.load, image_path, lazy = lazy, scale = scale, brightness = brightness,
+							   tint = tint, premultiply = premultiply)
+
+
+	@classmethod
+	def load_sound_async(cls, name: str, sound_path: str = None, streaming: bool = False) -> Future:
+		"""
+		Same as `load_sound`, but loads the sound on the loader pool.
+
+		Returns:
+			`Future[SoundAsset]`: A future resolving to the cached sound asset.
+		"""
+		return cls._load_async("sounds", name, SoundAsset.load, sound_path, streaming = streaming)
+
+
+	@classmethod
+	def load_font_async(cls, name: str, font_path: str = None) -> Future:
+		"""
+		Same as `load_font`, but loads the font on the loader pool.
+
+		Returns:
+			`Future[FontAsset]`: A future resolving to the cached font asset.
+		"""
+		return cls._load_async("fonts", name, FontAsset.load, font_path)
+
+
+	@classmethod
+	def load_text_file_async(cls, name: str, file_path: str = None) -> Future:
+		"""
+		Same as `load_text_file`, but loads the text file on the loader pool.
+
+		Returns:
+			`Future[TextFileAsset]`: A future resolving to the cached text file asset.
+		"""
+		return cls._load_async("text_files", name, TextFileAsset.load, file_path)
+
+
+	@classmethod
+	def preload(cls, manifest: dict[str, dict[str, str | tuple[str, dict]]]) -> list[Future]:
+		"""
+		Starts loading a whole batch of assets in the background. \n
+		The manifest maps a cache name (`"images"`, `"sounds"`, `"fonts"` or `"text_files"`) to a `{asset name: file path}` dict, e.g.:
+		`{"images": {"titleScreen/gf": "assets/images/TitleMenu/gfDanceTitle.png"}, "sounds": {...}}` \n
+		An entry can also be a `(file path, {extra loader arguments})` tuple, e.g. `("assets/images/shared/stageback.png", {"brightness": 0.4})`.
+
+		Args:
+			`manifest` (dict[str, dict[str, str | tuple[str, dict]]]): The assets to load.
+		Returns:
+			`list[Future]`: The futures for every asset in the manifest.
+		"""
+		loaders = {
+			"images":     cls.load_image_async,
+			"sounds":     cls.load_sound_async,
+			"fonts":      cls.load_font_async,
+			"text_files": cls.load_text_file_async,
+		}
+		futures = []
+		for cache_name, assets in manifest.items():
+			for name, entry in assets.items():
+				path, kwargs = entry if isinstance(entry, tuple) else (entry, {})
+				futures.append(loaders[cache_name](name, path, **kwargs))
+		return futures
+
+
+	#======== Loading ========#
+
+	@classmethod
+	def load_image(cls, name: str, image_path: str = None, lazy: bool = False, scale: float = 1.0, brightness: float = 1.0,
+				tint: tuple[int, int, int] | None = None, premultiply: bool = False) -> ImageAsset:
 		"""
 		Loads an image asset and stores it in the asset manager.
 
 		Args:
 			`name` (str): The name to associate with the image asset.
 			`image_path` (str): The file path to the image.
+			`lazy` (bool): If the image is an atlas, slice its frames on first access instead of right away.
+			`scale` (float): The scaling factor to apply.
+			`brightness` (float): The brightness factor to apply.
+			`tint` (tuple[int, int, int] | None): An RGB color to multiply the image by.
+			`premultiply` (bool): Whether to premultiply the color channels by alpha.
 		
 		Returns:
 			`ImageAsset`: The loaded image asset.
 		"""
 		# Load the image using the ImageAsset class bcz that's why we added load functions (duhhh)
 		# Oh, and only load it if it hasn't been loaded before
-		if cls.images.get(name) == None:
-			cls.images[name] = ImageAsset.load(image_path)
+		cls._acquire("images", name)
+		if cls._lookup("images", name) == None:
+			cls.images[name] = cls._timed_load("images", name, ImageAsset.load, image_path, lazy = lazy, scale = scale, brightness = brightness,
+											   tint = tint, premultiply = premultiply)
 		return cls.images[name]
 
 	
 	@classmethod
-	def load_sound(cls, name: str, sound_path: str = None) -> SoundAsset:
+	def load_sound(cls, name: str, sound_path: str = None, streaming: bool = False) -> SoundAsset:
 		"""
 		Loads a sound asset and stores it in the asset manager.
 
 		Args:
 			`name` (str): The name to associate with the sound asset.
 			`sound_path` (str): The file path to the sound.
+			`streaming` (bool): Whether to decode the sound incrementally while it plays (use it for music, not for sound effects).
 		"""
 		# Do the same for sounds...
-		if cls.sounds.get(name) == None:
-			cls.sounds[name] = SoundAsset.load(sound_path)
+		cls._acquire("sounds", name)
+		if cls._lookup("sounds", name) == None:
+			cls.sounds[name] = cls._timed_load("sounds", name, SoundAsset.load, sound_path, streaming = streaming)
 		return cls.sounds[name]
 
 
@@ -326,8 +1276,9 @@ class AssetManager:
 			`font_path` (str): The file path to the font.
 		"""
 		# ...And for fonts too ;)
-		if cls.fonts.get(name) == None:
-			cls.fonts[name] = FontAsset.load(font_path)
+		cls._acquire("fonts", name)
+		if cls._lookup("fonts", name) == None:
+			cls.fonts[name] = cls._timed_load("fonts", name, FontAsset.load, font_path)
 		return cls.fonts[name]
 	
 
@@ -343,10 +1294,36 @@ class AssetManager:
 			`TextFileAsset`: The loaded text file asset.
 		"""
 		# And for text files as well
-		if cls.text_files.get(name) == None:
-			cls.text_files[name] = TextFileAsset.load(file_path)
+		cls._acquire("text_files", name)
+		if cls._lookup("text_files", name) == None:
+			cls.text_files[name] = cls._timed_load("text_files", name, TextFileAsset.load, file_path)
 		return cls.text_files[name]
 
+
+	@classmethod
+	def load_variant(cls, base: ImageAsset, transforms: tuple) -> ImageAsset:
+		"""
+		Derives an image asset from another one and stores it in the asset manager. \n
+		Variants are keyed by what the base asset is made of (its source image and transforms) plus the new transforms,
+		so equal variants are only computed once no matter which state (or which base asset object) asks for them.
+		You usually want `ImageAsset.variant` instead.
+
+		Args:
+			`base` (ImageAsset): The image asset to derive the variant from.
+			`transforms` (tuple): The transform chain to apply on top of it, as `(name, value)` pairs.
+		Returns:
+			`ImageAsset`: The interned variant.
+		"""
+		# Assets that weren't loaded from a file can only be told apart by identity
+		source = base.image_path if base.image_path != None else f"<{id(base)}>"
+		name = f"{source}|{'lazy' if isinstance(base.texture, LazyAtlas) else 'eager'}|{base.transforms!r}|{transforms!r}"
+		cls._acquire("variants", name)
+		if cls._lookup("variants", name) == None:
+			cls.variants[name] = cls._timed_load("variants", name, base.apply_transforms, transforms)
+			if base.image_path == None:
+				cls._variant_bases[name] = base
+		return cls.variants[name]
+
 	@staticmethod
 	def load_shared_sounds() -> None:
 		"""
@@ -0,0 +1,248 @@
+# Friday Night Funkin' Astral Engine
+
+### Asset Pack
+# This module handles packed asset archives: the whole `assets/` folder bundled into a single indexed file.
+# The archive is memory-mapped once, so loading an asset from it needs no per-file opens, and atlases come with their
+# frame tables precompiled to binary arrays, so there's no XML to parse at runtime either.
+#
+# Build one with:
+#   python source/AssetPack.py [assets folder] [output file]
+#
+# When no archive is mounted (or an asset isn't in it), everything gets loaded from the loose files like always.
+
+from xml.etree import ElementTree as ET
+from array import array
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+
+# Archive layout (little endian):
+#   header:   magic, version, manifest offset, manifest size
+#   blobs:    the raw bytes of every file, and the frame table of every atlas (int32 x, y, width, height, frameX, frameY, frameWidth, frameHeight per frame)
+#   manifest: UTF-8 JSON, {asset path: {"type", "offset", "size", "sha1", and for atlases "atlas": {"offset", "count", "sha1", "names"}}}
+HEADER = struct.Struct("<4sIQQ")
+MAGIC  = b"ASTP"
+
+# Which files get packed, and as what. Sounds stay loose: arcade, pyglet and librosa all want a real file to read them from.
+ASSET_TYPES = {
+	".png": "image",
+	".ttf": "font",
+	".otf": "font",
+	".txt": "text",
+	".json": "text",
+}
+
+
+def normalize_path(path: str) -> str:
+	"""Normalizes an asset path so `assets/images/../images/a.png` and `assets\\images\\a.png` map to the same entry."""
+	return os.path.normpath(path).replace(os.sep, "/")
+
+
+
+class AssetPack:
+	"""
+	The currently mounted asset archive (if any).
+	Attributes:
+		`path` (str | None): The file path of the mounted archive.
+		`entries` (dict[str, dict]): The archive manifest, mapping every packed asset path to its entry.
+	"""
+	VERSION: int = 1
+
+	path: str = None
+	entries: dict[str, dict] = {}
+	_data: mmap.mmap = None
+	_built_at: int = 0		# The archive's modification time (loose files edited after it win over their packed copy, see `entry`)
+
+
+	#======== Runtime ========#
+
+	@classmethod
+	def mount(cls, path: str) -> bool:
+		"""
+		Memory-maps an asset archive and reads its manifest. Assets in it get loaded from it from now on.
+
+		Args:
+			`path` (str): The file path to the archive.
+		Returns:
+			`bool`: Whether the archive could be mounted (missing, truncated or corrupt archives just don't get mounted).
+		"""
+		try:
+			with open(path, "rb") as f:
+				data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+		except (OSError, ValueError):		# (empty files can't be mapped at all)
+			return False
+
+		magic = version = entries = None
+		if len(data) >= HEADER.size:
+			magic, version, manifest_offset, manifest_size = HEADER.unpack_from(data, 0)
+		if magic == MAGIC and version == cls.VERSION and manifest_offset + manifest_size <= len(data):
+			try:
+				entries = json.loads(bytes(data[manifest_offset : manifest_offset + manifest_size]).decode("utf-8"))
+			except (UnicodeDecodeError, json.JSONDecodeError):
+				pass
+		if not isinstance(entries, dict):
+			data.close()
+			return False
+
+		cls.path    = path
+		cls.entries = entries
+		cls._data   = data
+		cls._built_at = os.stat(path).st_mtime_ns
+		return True
+
+
+	@classmethod
+	def unmount(cls) -> None:
+		"""Goes back to loading everything from the loose files."""
+		cls.path    = None
+		cls.entries = {}
+		cls._data   = None		# Not closed explicitly: images mapped from it may still be alive
+
+
+	@classmethod
+	def entry(cls, path: str) -> dict | None:
+		"""
+		Returns:
+			`dict | None`: The manifest entry of an asset, or None if it isn't packed (or no archive is mounted). \n
+			Assets whose loose file (or atlas XML) got edited after the archive was built count as not packed, so they get loaded
+			from the loose file instead of their stale packed copy (which is also what makes hot reloading work with an archive mounted).
+		"""
+		if cls._data == None:
+			return None
+		entry = cls.entries.get(normalize_path(path))
+		if entry != None and cls._edited_since_built(path, entry):
+			return None
+		return entry
+
+
+	@classmethod
+	def _edited_since_built(cls, path: str, entry: dict) -> bool:
+		# (loose files that aren't around at all can't be newer, the archive is all there is)
+		paths = [path, os.path.splitext(path)[0] + ".xml"] if "atlas" in entry else [path]
+		for loose_path in paths:
+			try:
+				if os.stat(loose_path).st_mtime_ns > cls._built_at:
+					return True
+			except FileNotFoundError:
+				pass
+		return False
+
+
+	@classmethod
+	def read(cls, path: str) -> memoryview | None:
+		"""
+		Returns:
+			`memoryview | None`: The raw bytes of a packed asset (straight from the mapped archive), or None if it isn't packed.
+		"""
+		entry = cls.entry(path)
+		if entry == None:
+			return None
+		return memoryview(cls._data)[entry["offset"] : entry["offset"] + entry["size"]]
+
+
+	@classmethod
+	def atlas_index(cls, image_path: str) -> tuple[list[str], list[tuple[int, int, int, int]], array] | None:
+		"""
+		Returns the precompiled frame index of a packed atlas, in the same format as `AssetManager.parse_xml_atlas`.
+
+		Returns:
+			`tuple[list[str], list[tuple[int, int, int, int]], array] | None`: The frame names, source rectangles and untrimmed frames,
+			or None if the image isn't a packed atlas.
+		"""
+		entry = cls.entry(image_path)
+		if entry == None or "atlas" not in entry:
+			return None
+		atlas = entry["atlas"]
+		table = array("i")
+		table.frombytes(cls._data[atlas["offset"] : atlas["offset"] + 32 * atlas["count"]])
+
+		rects = [tuple(table[8 * i : 8 * i + 4]) for i in range(atlas["count"])]
+		frames = array("i")
+		for i in range(atlas["count"]):
+			frames.extend(table[8 * i + 4 : 8 * i + 8])
+		return atlas["names"], rects, frames
+
+
+	#======== Building ========#
+
+	@classmethod
+	def build(cls, assets_dir: str, out_path: str) -> dict[str, dict]:
+		"""
+		Packs every supported file under `assets_dir` into a single archive. Atlas XMLs get precompiled into frame tables
+		and attached to their spritesheet's entry.
+
+		Args:
+			`assets_dir` (str): The folder to pack (asset paths are stored relative to its parent, like `assets/images/...`).
+			`out_path` (str): Where to write the archive.
+		Returns:
+			`dict[str, dict]`: The manifest of the archive.
+		"""
+		root = os.path.dirname(os.path.normpath(assets_dir))
+		manifest: dict[str, dict] = {}
+
+		temp_path = out_path + ".tmp"
+		with open(temp_path, "wb") as f:
+			f.write(HEADER.pack(MAGIC, cls.VERSION, 0, 0))		# Patched once we know where the manifest goes
+
+			for folder, _, files in sorted(os.walk(assets_dir)):
+				for file_name in sorted(files):
+					asset_type = ASSET_TYPES.get(os.path.splitext(file_name)[1].lower())
+					if asset_type == None:
+						continue
+					file_path = os.path.join(folder, file_name)
+					with open(file_path, "rb") as asset_file:
+						content = asset_file.read()
+
+					entry = {
+						"type":   asset_type,
+						"offset": f.tell(),
+						"size":   len(content),
+						"sha1":   hashlib.sha1(content).hexdigest(),
+					}
+					f.write(content)
+
+					# Spritesheets with an XML next to them get their frame table precompiled
+					xml_path = os.path.splitext(file_path)[0] + ".xml"
+					if asset_type == "image" and os.path.exists(xml_path):
+						names, table = cls._compile_atlas(xml_path)
+						entry["atlas"] = {"offset": f.tell(), "count": len(names), "sha1": hashlib.sha1(table.tobytes()).hexdigest(), "names": names}
+						f.write(table.tobytes())
+
+					manifest[normalize_path(os.path.relpath(file_path, root))] = entry
+
+			manifest_bytes = json.dumps(manifest, separators = (",", ":")).encode("utf-8")
+			manifest_offset = f.tell()
+			f.write(manifest_bytes)
+			f.seek(0)
+			f.write(HEADER.pack(MAGIC, cls.VERSION, manifest_offset, len(manifest_bytes)))
+
+		os.replace(temp_path, out_path)
+		return manifest
+
+
+	@staticmethod
+	def _compile_atlas(xml_path: str) -> tuple[list[str], array]:
+		# Same rules as `parse_xml_atlas`, flattened into one int32 array
+		names = []
+		table = array("i")
+		for sub in ET.parse(xml_path).getroot().findall("SubTexture"):
+			names.append(sub.attrib["name"])
+			w, h = int(sub.attrib["width"]), int(sub.attrib["height"])
+			table.extend((int(sub.attrib["x"]), int(sub.attrib["y"]), w, h,
+						  int(sub.attrib.get("frameX", 0)), int(sub.attrib.get("frameY", 0)),
+						  int(sub.attrib.get("frameWidth", w)), int(sub.attrib.get("frameHeight", h))))
+		return names, table
+
+
+
+if __name__ == "__main__":
+	assets_dir = sys.argv[1] if len(sys.argv) > 1 else "assets"
+	out_path   = sys.argv[2] if len(sys.argv) > 2 else "assets.pak"
+
+	manifest = AssetPack.build(assets_dir, out_path)
+	atlases = sum("atlas" in entry for entry in manifest.values())
+	print(f"Packed {len(manifest)} assets ({atlases} atlases) into {out_path} ({os.path.getsize(out_path) / 1024 / 1024:.1f} MiB)")
@@ -4,9 +4,12 @@
 # This is the main entry point for Astral.
 
 import arcade as arc
+import os
 from states.TitleState import TitleState
 from states.MainMenuState import MainMenuState
 from AssetManager import *
+from AssetPack import AssetPack
+from SpritePacker import SpritePacker
 from StateManager import *
 from Input import *
 from Conductor import Conductor
@@ -16,12 +19,22 @@ class Astral(arc.Window):
 	def __init__(self):
 		super().__init__(1280, 720, "Friday Night Funkin' - Astral Engine v0.1 (Development Build)")
 
+		# Load assets from the packed archive if it's been built (see AssetPack.py), otherwise from the loose files
+		AssetPack.mount("assets.pak")
+		# Same goes for the shared spritesheets (see SpritePacker.py)
+		SpritePacker.load_index("assets/packed/index.json")
+
 		# Set up the state manager and all other managers
 		StateManager.init(self)
 		self.conductor	 = Conductor()
 		self.inp_manager = InputManager()
 		self.kb_source   = KeyboardSource()
 		self.inp_manager.add_source(self.kb_source)
+		# Set ASTRAL_RECORD_INPUT=<file> to record every input, and ASTRAL_REPLAY=<file> to play a recording back
+		if os.environ.get("ASTRAL_REPLAY"):
+			self.inp_manager.add_source(ReplaySource(os.environ["ASTRAL_REPLAY"]))
+		if os.environ.get("ASTRAL_RECORD_INPUT"):
+			self.inp_manager.start_recording(os.environ["ASTRAL_RECORD_INPUT"])
 		self.main_time = 0
 		self.song_time = 0
 		self.current_time = 0
@@ -43,16 +56,17 @@ class Astral(arc.Window):
 		self.main_time += dt
 		self.current_time = self.main_time if StateManager.all_states.get("play", None) != StateManager.current_state else self.song_time
 		self.inp_manager.update(self.current_time)   # you have no idea how streesd out i was bcz i forgot this god damn line
+		# Pick up edited assets without restarting (only with ASTRAL_HOT_RELOAD=1)
+		StateManager.swap_textures(AssetManager.poll_reload(dt))
 	
 	def on_key_press(self, key, mods):
 		# Delegate to the keyboard input source
-		# Use `main_time` if we're not in PlayState (PS: it does not exist yet), otherwise use `song_time`
-		self.kb_source.on_key_press(key, mods, self.current_time)
+		# It timestamps the press itself, in whatever timebase `inp_manager.update` got last (`main_time`, or `song_time` in PlayState)
+		self.kb_source.on_key_press(key, mods)
 	
 	def on_key_release(self, key, mods):
 		# Delegate to the keyboard input source
-		# Use `main_time` if we're not in PlayState (PS: it does not exist yet), otherwise use `song_time`
-		self.kb_source.on_key_release(key, mods, self.current_time)
+		self.kb_source.on_key_release(key, mods)
 
 
 if __name__ == "__main__":
@@ -62,4 +76,10 @@ if __name__ == "__main__":
 	app = Astral()
 	print("Ladies n gentlemen, it is time for some funkin'!")
 
-	arc.run()
\ No newline at end of file
+	arc.run()
+	Conductor.shutdown_analysis()
+	app.inp_manager.stop_recording()
+
+	# Set ASTRAL_ASSET_STATS=1 to see which assets dominate startup and memory
+	if os.environ.get("ASTRAL_ASSET_STATS", "0") != "0":
+		print(AssetManager.dump_stats())
\ No newline at end of file
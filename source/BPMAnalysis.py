@@ -0,0 +1,291 @@
+# Friday Night Funkin' Astral Engine
+
+### BPM Analysis
+# This module holds the actual BPM detection. It's kept apart from the Conductor (and away from arcade) on purpose:
+# `Conductor.analyze` runs it in worker processes, and every worker has to import it.
+# There are two estimators to pick from (see `ESTIMATORS`):
+#   - "librosa": librosa's beat tracker. Accurate, but librosa takes seconds to import (and JIT-compile on first use).
+#   - "numpy": a spectral flux onset envelope plus autocorrelation, in plain NumPy. Much lighter, and only gives a
+#     constant beat grid (which is all `BPMData` stores anyway).
+# librosa only gets imported when its estimator actually runs.
+#
+# Songs can also be analyzed ahead of time (see `AnalyzeSongs.py`), which leaves a sidecar file next to every song
+# with its BPM, beat grid and per-step energy. The Conductor reads those before analyzing anything itself.
+
+from importlib import metadata
+import json
+import os
+import numpy as np
+import soundfile
+from BPMCache import BPMCache
+
+
+def _results(bpm: float, beat_times) -> dict:
+	# Everything a `BPMData` needs
+	beat_ms = 60000.0 / bpm
+	return {
+		"bpm":               bpm,
+		"measure_length_ms": beat_ms * 4,
+		"beat_length_ms":    beat_ms,
+		"step_length_ms":    beat_ms / 4,
+		"beat_times":        [float(t) for t in beat_times],
+	}
+
+
+
+###====== librosa ======###
+
+def estimate_librosa(audio_path: str, params: dict) -> dict:
+	"""Estimates a song's BPM and beat times with librosa's beat tracker (see `analyze_song`)."""
+	import librosa
+
+	# Downsample and cut the song so we can quickly get its BPM faster
+	y, sr = librosa.load(audio_path, sr=params["sample_rate"], mono=True)
+	y, (start, _) = librosa.effects.trim(y, top_db=params["trim_top_db"])
+
+	onset_env = librosa.onset.onset_strength(y=y, sr=sr)
+	_, beats = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr)
+	beat_times = librosa.frames_to_time(beats, sr=sr) + start / sr	# (relative to the untrimmed song)
+	intervals = np.diff(beat_times)
+	# Calculate the average BPM for the song
+	bpm = float(np.median(60 / intervals))
+	return _results(bpm, beat_times)
+
+
+
+###====== NumPy ======###
+
+# The numpy estimator's knobs (all of them end up in the analysis parameters, see `estimator_params`)
+NUMPY_ESTIMATOR_VERSION: int = 1		# Bump this whenever the algorithm itself changes
+FFT_SIZE: int		= 1024				# STFT window, in samples (~93 ms at 11025 Hz)
+HOP_SIZE: int		= 128				# STFT hop, in samples (~12 ms at 11025 Hz, which is also the envelope's resolution)
+BPM_RANGE: tuple	= (60.0, 240.0)		# The tempos that get considered at all
+BPM_PRIOR: float	= 120.0				# Tempos an octave or more away from this get less and less likely (breaks 102 vs 204 ties)
+HARMONICS: int		= 4					# How many multiples of a beat period have to line up with the song too
+
+
+def load_mono(audio_path: str, sample_rate: int) -> tuple[np.ndarray, float]:
+	"""
+	Decodes a song as mono float32, decimated by a whole factor to roughly `sample_rate` (averaging the samples it drops,
+	which doubles as a cheap anti-aliasing filter).
+
+	Returns:
+		`tuple[np.ndarray, float]`: The samples and their actual sample rate.
+	"""
+	y, sr = soundfile.read(audio_path, dtype = "float32", always_2d = True)
+	factor = max(int(sr // sample_rate), 1)
+	# Every `factor` frames of every channel are next to each other in memory, so mixing down and decimating is a single mean
+	y = y[:len(y) // factor * factor].reshape(-1, factor * y.shape[1]).mean(axis = 1)
+	return y, sr / factor
+
+
+def onset_envelope(y: np.ndarray, sr: float, top_db: float) -> tuple[np.ndarray, int]:
+	"""
+	Computes the spectral flux onset envelope (how much louder every frequency got since the last frame, summed up),
+	leaving out the quiet start and end of the song.
+
+	Args:
+		`y` (np.ndarray): Mono samples (see `load_mono`).
+		`sr` (float): Their sample rate.
+		`top_db` (float): How far below the loudest frame counts as silence, in dB.
+	Returns:
+		`tuple[np.ndarray, int]`: The envelope (one value per hop) and the frame it starts at.
+	"""
+	frames = np.lib.stride_tricks.sliding_window_view(y, FFT_SIZE)[::HOP_SIZE]		# (a view, nothing gets copied)
+
+	# Trim the silence, like `librosa.effects.trim`
+	rms = np.sqrt(np.mean(frames ** 2, axis = 1))
+	loud = np.flatnonzero(rms > rms.max() * 10 ** (-top_db / 20))
+	start, end = loud[0], loud[-1] + 1
+
+	spectrum = np.abs(np.fft.rfft(frames[start:end] * np.hanning(FFT_SIZE).astype(np.float32), axis = 1))
+	spectrum = np.log1p(100 * spectrum)		# Log compression, so quiet hi-hats count too
+	flux = np.maximum(np.diff(spectrum, axis = 0), 0).sum(axis = 1)
+
+	# Only keep what sticks out of the last half second or so (a sustained loud part isn't a beat)
+	width = int(0.5 * sr / HOP_SIZE) | 1
+	flux = np.maximum(flux - np.convolve(flux, np.ones(width) / width, mode = "same"), 0)
+	return flux, start + 1
+
+
+def autocorrelate(x: np.ndarray) -> np.ndarray:
+	"""Returns the (normalized) autocorrelation of `x` at every lag, through the FFT."""
+	x = x - x.mean()
+	size = 1 << (2 * len(x) - 1).bit_length()
+	spectrum = np.fft.rfft(x, size)
+	ac = np.fft.irfft(spectrum * np.conj(spectrum), size)[:len(x)]
+	return ac / ac[0] if ac[0] > 0 else ac
+
+
+def estimate_numpy(audio_path: str, params: dict) -> dict:
+	"""Estimates a song's BPM and beat times with NumPy only (see `analyze_song`)."""
+	y, sr = load_mono(audio_path, params["sample_rate"])
+	envelope, start = onset_envelope(y, sr, params["trim_top_db"])
+	fps = sr / HOP_SIZE
+	ac = autocorrelate(envelope)
+
+	# Score every candidate tempo by how well the song repeats after 1, 2, 3... of its beats
+	bpms = np.arange(BPM_RANGE[0], BPM_RANGE[1], 0.05)
+	lags = fps * 60 / bpms
+	lag_axis = np.arange(len(ac))
+	score = sum(np.interp(k * lags, lag_axis, ac, right = 0) for k in range(1, HARMONICS + 1))
+	score *= np.exp(-0.5 * np.log2(bpms / BPM_PRIOR) ** 2)
+	bpm = round(float(bpms[np.argmax(score)]), 2)		# (the candidates are 0.05 BPM apart anyway)
+
+	# Line a beat grid up with the onsets: the phase whose beats land on the most onset strength wins
+	period = fps * 60 / bpm
+	beats = np.arange(0, len(envelope) - period, period)
+	phases = np.arange(int(period))
+	strength = envelope[(phases[:, None] + beats[None, :]).astype(np.intp)].sum(axis = 1)
+	phase = phases[np.argmax(strength)]
+	beat_times = (start + phase + beats) / fps + FFT_SIZE / 2 / sr		# (relative to the untrimmed song, and to the middle of every frame)
+	return _results(bpm, beat_times)
+
+
+
+###====== Entry point ======###
+
+ESTIMATORS = {
+	"librosa": estimate_librosa,
+	"numpy":   estimate_numpy,
+}
+
+
+def estimator_params(estimator: str) -> dict:
+	"""
+	Returns everything about an estimator that changes what it finds: the version of the library behind it (looked up without
+	importing it), and for the numpy one, its own version and knobs. Retuning any of them makes cached results get redone.
+	"""
+	params = {"version": metadata.version(estimator)}
+	if estimator == "numpy":
+		params.update({
+			"algorithm": NUMPY_ESTIMATOR_VERSION,
+			"fft_size":  FFT_SIZE,
+			"hop_size":  HOP_SIZE,
+			"bpm_range": BPM_RANGE,
+			"bpm_prior": BPM_PRIOR,
+			"harmonics": HARMONICS,
+		})
+	return params
+
+
+# How songs get analyzed by default: "librosa" or "numpy" (`Conductor.estimator` starts out as this)
+DEFAULT_ESTIMATOR: str = os.environ.get("ASTRAL_BPM_ESTIMATOR", "librosa")
+
+# Everything (besides the estimator) that changes what the analysis finds. Songs analyzed with anything else get analyzed again.
+ANALYSIS_PARAMS: dict = {
+	"sample_rate": 11025,
+	"trim_top_db": 20,
+}
+
+
+def analysis_params(estimator: str | None = None) -> dict:
+	"""
+	Args:
+		`estimator` (str | None): Which of the `ESTIMATORS` to use (None -> `DEFAULT_ESTIMATOR`).
+	Returns:
+		`dict`: Everything that changes what the analysis finds (which is also what the `BPMCache` and sidecars are keyed by).
+	"""
+	estimator = estimator or DEFAULT_ESTIMATOR
+	return {**ANALYSIS_PARAMS, "estimator": estimator, **estimator_params(estimator)}
+
+
+def analyze_song(audio_path: str, params: dict) -> dict:
+	"""
+	Estimates a song's BPM and beat times, and stores the results in the `BPMCache`.
+
+	Args:
+		`audio_path` (str): The file path to the song.
+		`params` (dict): The analysis parameters (see `analysis_params`), including which of the `ESTIMATORS` to use.
+	Returns:
+		`dict`: The results, as the fields of a `BPMData`.
+	"""
+	results = ESTIMATORS[params["estimator"]](audio_path, params)
+	# Cache it on disk too, so the next launch can skip all of this
+	BPMCache.write(audio_path, params, results)
+	return results
+
+
+
+###====== Sidecars ======###
+
+SIDECAR_VERSION: int	= 1						# Bump this whenever the sidecar format changes
+SIDECAR_SUFFIX: str		= ".analysis.json"		# song.ogg -> song.analysis.json
+
+
+def sidecar_path(audio_path: str) -> str:
+	"""Returns where a song's sidecar goes (right next to it)."""
+	return os.path.splitext(audio_path)[0] + SIDECAR_SUFFIX
+
+
+def step_energy(y: np.ndarray, sr: float, bpm: float) -> list[float]:
+	"""
+	Computes how loud every step of a song is, on the Conductor's beat grid (so step 0 starts at 0 seconds).
+
+	Args:
+		`y` (np.ndarray): Mono samples (see `load_mono`).
+		`sr` (float): Their sample rate.
+		`bpm` (float): The song's BPM.
+	Returns:
+		`list[float]`: The RMS loudness of every step, scaled so the loudest one is 1.
+	"""
+	step_samples = 15 / bpm * sr
+	bounds = (np.arange(int(np.ceil(len(y) / step_samples))) * step_samples).astype(np.intp)
+	lengths = np.diff(np.append(bounds, len(y)))
+	rms = np.sqrt(np.add.reduceat(y.astype(np.float64) ** 2, bounds) / lengths)
+	peak = rms.max()
+	return np.round(rms / peak if peak > 0 else rms, 4).tolist()
+
+
+def write_sidecar(audio_path: str, params: dict) -> dict:
+	"""
+	Analyzes a song (see `analyze_song`), works out its per-step energy too, and stores everything in its sidecar.
+
+	Args:
+		`audio_path` (str): The file path to the song.
+		`params` (dict): The analysis parameters (see `analysis_params`).
+	Returns:
+		`dict`: The analysis, as the fields of a `BPMData`.
+	"""
+	analysis = analyze_song(audio_path, params)
+	y, sr = load_mono(audio_path, params["sample_rate"])
+	analysis["step_energy"] = step_energy(y, sr, analysis["bpm"])
+
+	sidecar = {
+		"version":  SIDECAR_VERSION,
+		"sha1":     BPMCache.content_hash(audio_path),		# So a sidecar never outlives the song it was made for
+		"params":   params,
+		"analysis": analysis,
+	}
+	# Same as the BPM cache, write to a temporary file first so a half-written sidecar never gets read
+	path = sidecar_path(audio_path)
+	with open(path + ".tmp", "w", encoding = "utf-8") as f:
+		json.dump(sidecar, f, separators = (",", ":"))
+	os.replace(path + ".tmp", path)
+	return analysis
+
+
+def read_sidecar(audio_path: str, params: dict | None = None) -> dict | None:
+	"""
+	Args:
+		`audio_path` (str): The file path to the song.
+		`params` (dict | None): Only take the sidecar if it was made with these exact analysis parameters (see `analysis_params`,
+			None -> any), just like the `BPMCache`.
+	Returns:
+		`dict | None`: The analysis stored in a song's sidecar (as the fields of a `BPMData`), or None if it has none,
+			or it's from another version, another song (like when the song got replaced after the analysis) or other parameters.
+	"""
+	path = sidecar_path(audio_path)
+	if not os.path.exists(path):
+		return None
+	try:
+		with open(path, "r", encoding = "utf-8") as f:
+			sidecar = json.load(f)
+	except (OSError, json.JSONDecodeError):
+		return None
+	if sidecar.get("version") != SIDECAR_VERSION or sidecar.get("sha1") != BPMCache.content_hash(audio_path):
+		return None
+	# (through JSON and back, so tuples compare equal to the lists they got stored as)
+	if params != None and sidecar.get("params") != json.loads(json.dumps(params)):
+		return None
+	return sidecar["analysis"]
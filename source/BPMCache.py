@@ -0,0 +1,111 @@
+# Friday Night Funkin' Astral Engine
+
+### BPM Cache
+# This module handles the persistent, on-disk cache of BPM analysis results.
+# Entries are keyed by the *contents* of the audio file (so renaming or touching a song doesn't throw its analysis away)
+# and by the analysis parameters (so changing how songs get analyzed throws all of them away).
+
+import hashlib
+import json
+import os
+import threading
+
+
+class BPMCache:
+	"""
+	The persistent BPM analysis cache.
+	Attributes:
+		`enabled` (bool): Whether the cache is used at all. Can be turned off with the `ASTRAL_BPM_CACHE=0` environment variable.
+		`directory` (str): Where the cache entries are stored.
+	"""
+	VERSION: int = 1		# Bump this whenever the entry format changes
+
+	enabled: bool = os.environ.get("ASTRAL_BPM_CACHE", "1") != "0"
+	directory: str = ".astral_cache/bpm"
+
+	_hashes: dict[tuple[str, int, int], str] = {}		# (path, mtime, size) -> content hash, so each file only gets hashed once per run
+
+
+	@classmethod
+	def content_hash(cls, audio_path: str) -> str | None:
+		"""
+		Returns:
+			`str | None`: The SHA-1 of the audio file's contents, or None if it doesn't exist.
+		"""
+		try:
+			stat = os.stat(audio_path)
+		except FileNotFoundError:
+			return None
+		file_id = (os.path.abspath(audio_path), stat.st_mtime_ns, stat.st_size)
+		digest = cls._hashes.get(file_id)
+		if digest == None:
+			sha1 = hashlib.sha1()
+			with open(audio_path, "rb") as f:
+				for chunk in iter(lambda: f.read(1 << 20), b""):
+					sha1.update(chunk)
+			digest = cls._hashes[file_id] = sha1.hexdigest()
+		return digest
+
+
+	@classmethod
+	def entry_key(cls, audio_path: str, params: dict) -> str | None:
+		"""
+		Computes the cache key of a song analyzed with a set of parameters.
+
+		Args:
+			`audio_path` (str): The file path to the song.
+			`params` (dict): Everything that affects the analysis results (sample rate, trim threshold, library versions...).
+		Returns:
+			`str | None`: The cache key, or None if the song doesn't exist.
+		"""
+		digest = cls.content_hash(audio_path)
+		if digest == None:
+			return None
+		key = f"{cls.VERSION}|{digest}|{sorted(params.items())!r}"
+		return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+	@classmethod
+	def read(cls, audio_path: str, params: dict) -> dict | None:
+		"""
+		Args:
+			`audio_path` (str): The file path to the song.
+			`params` (dict): The analysis parameters (see `entry_key`).
+		Returns:
+			`dict | None`: The stored analysis results, or None on a cache miss.
+		"""
+		if not cls.enabled:
+			return None
+		key = cls.entry_key(audio_path, params)
+		if key == None:
+			return None
+		try:
+			with open(os.path.join(cls.directory, key + ".json"), "r", encoding = "utf-8") as f:
+				return json.load(f)
+		except (FileNotFoundError, json.JSONDecodeError):
+			return None
+
+
+	@classmethod
+	def write(cls, audio_path: str, params: dict, results: dict) -> None:
+		"""
+		Stores a song's analysis results.
+
+		Args:
+			`audio_path` (str): The file path to the song.
+			`params` (dict): The analysis parameters (see `entry_key`).
+			`results` (dict): The analysis results (anything JSON can store).
+		"""
+		if not cls.enabled:
+			return
+		key = cls.entry_key(audio_path, params)
+		if key == None:
+			return
+
+		os.makedirs(cls.directory, exist_ok = True)
+		# Write to a temporary file first so a half-written entry never gets read
+		final_path = os.path.join(cls.directory, key + ".json")
+		temp_path  = f"{final_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+		with open(temp_path, "w", encoding = "utf-8") as f:
+			json.dump(results, f)
+		os.replace(temp_path, final_path)
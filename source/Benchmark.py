@@ -0,0 +1,179 @@
+# Friday Night Funkin' Astral Engine
+
+### Benchmarks
+# Small benchmarks for the engine's hot paths.
+# Run them from the repo root (just like the game, so the asset paths resolve):
+#   python source/Benchmark.py <benchmark name>
+
+import argparse
+import shutil
+import tempfile
+import time
+
+
+def timed(func, *args, **kwargs) -> tuple[float, object]:
+	"""Runs `func` once and returns how long it took (in seconds) along with its result."""
+	start = time.perf_counter()
+	result = func(*args, **kwargs)
+	return time.perf_counter() - start, result
+
+
+
+###============ Texture cache ============###
+
+def bench_texture_cache(args) -> None:
+	"""
+	Loads every image the title screen and main menu declare with the texture cache off, cold (empty) and warm.
+	"""
+	from AssetManager import ImageAsset
+	from TextureCache import TextureCache
+	from states.TitleState import TitleState
+	from states.MainMenuState import MainMenuState
+
+	images = {}
+	for state in (TitleState, MainMenuState):
+		for name, entry in state.preload_manifest.get("images", {}).items():
+			path, kwargs = entry if isinstance(entry, tuple) else (entry, {})
+			images[name] = (path, {**kwargs, "lazy": False})	# Lazy atlases skip the cache, so load everything eagerly
+
+	def load_all() -> None:
+		for path, kwargs in images.values():
+			ImageAsset.load(path, **kwargs)
+
+	cache_dir = tempfile.mkdtemp(prefix = "astral-texture-cache-")
+	TextureCache.directory = cache_dir
+	try:
+		TextureCache.enabled = False
+		off, _ = timed(load_all)
+		TextureCache.enabled = True
+		cold, _ = timed(load_all)
+		warm, _ = timed(load_all)
+	finally:
+		shutil.rmtree(cache_dir, ignore_errors = True)
+
+	print(f"{len(images)} images")
+	print(f"  cache off:  {off * 1000:9.1f} ms")
+	print(f"  cache cold: {cold * 1000:9.1f} ms  (decode + process + write)")
+	print(f"  cache warm: {warm * 1000:9.1f} ms  (mapped from disk)")
+
+
+
+###============ Sheet transforms ============###
+
+def bench_sheet_transforms(args) -> None:
+	"""
+	Compares the old step by step PIL path (slice, then `apply_scale`/`apply_brightness` every frame, one step at a time) against
+	slicing with the whole chain fused into `transform_sheet` (see `LazyAtlas.from_xml`), on the title screen atlases. \n
+	Fused chains that scale still run frame by frame (just in one pass), only color-only chains run over the whole sheet at once.
+	"""
+	from AssetManager import ImageAsset, load_xml_atlas
+
+	sheets = ["assets/images/TitleMenu/gfDanceTitle.png", "assets/images/TitleMenu/logoBumpin.png"]
+	chains = [(("scale", 0.8),), (("scale", 0.8), ("brightness", 0.4)), (("brightness", 0.4),)]
+
+	def step_by_step(image_path: str, transforms: tuple) -> None:
+		xml_path = image_path.rsplit('.', 1)[0] + '.xml'
+		asset = ImageAsset(load_xml_atlas(xml_path, image_path), image_path, xml_path)
+		for name, value in transforms:
+			asset = asset.apply_scale(value) if name == "scale" else asset.apply_brightness(value)
+
+	def fused(image_path: str, transforms: tuple) -> None:
+		load_xml_atlas(image_path.rsplit('.', 1)[0] + '.xml', image_path, transforms)
+
+	for image_path in sheets:
+		for transforms in chains:
+			old, _ = timed(step_by_step, image_path, transforms)
+			new, _ = timed(fused, image_path, transforms)
+			label = " + ".join(f"{name} {value}" for name, value in transforms)
+			where = "per frame" if dict(transforms).get("scale", 1.0) != 1.0 else "per sheet"
+			print(f"{image_path.rsplit('/', 1)[-1]:<18} {label:<26} step by step {old * 1000:8.1f} ms   fused ({where}) {new * 1000:8.1f} ms   ({old / new:.2f}x)")
+
+
+
+###============ Atlas slicing ============###
+
+def bench_atlas_slicing(args) -> None:
+	"""
+	Slices the bundled atlases with a growing number of worker threads (the sheets are decoded up front, so only slicing is timed),
+	then compares arcade's default hit box algorithm against the bounding box one on a single thread.
+	"""
+	import arcade as arc
+	import os
+	from AssetManager import ImageAsset, LazyAtlas
+
+	sheets = ["assets/images/TitleMenu/gfDanceTitle.png", "assets/images/TitleMenu/logoBumpin.png", "assets/images/MainMenu/storymode.png"]
+	worker_counts = args.workers or sorted({1, 2, 4, os.cpu_count() or 1})
+
+	def slice_atlas(image_path: str, workers: int) -> float:
+		atlas = LazyAtlas.from_xml(image_path.rsplit('.', 1)[0] + '.xml', image_path)
+		_ = atlas[0]		# Decode the sheet
+		elapsed, frames = timed(atlas.slice_all, workers)
+		assert frames == [atlas[i] for i in range(len(atlas))]
+		return elapsed
+
+	print(f"{os.cpu_count()} CPU cores")
+	for image_path in sheets:
+		baseline = None
+		for workers in worker_counts:
+			elapsed = slice_atlas(image_path, workers)
+			baseline = baseline or elapsed
+			print(f"{image_path.rsplit('/', 1)[-1]:<18} {workers:>2} workers  {elapsed * 1000:8.1f} ms   ({baseline / elapsed:.2f}x)")
+
+	default_algorithm = ImageAsset.hit_box_algorithm
+	try:
+		ImageAsset.hit_box_algorithm = arc.hitbox.algo_default
+		simple = slice_atlas(sheets[0], 1)
+	finally:
+		ImageAsset.hit_box_algorithm = default_algorithm
+	bounding_box = slice_atlas(sheets[0], 1)
+	print(f"{sheets[0].rsplit('/', 1)[-1]:<18} hit boxes: default {simple * 1000:8.1f} ms   bounding box {bounding_box * 1000:8.1f} ms   ({simple / bounding_box:.2f}x)")
+
+
+
+###============ BPM estimators ============###
+
+def bench_bpm_estimators(args) -> None:
+	"""
+	Runs both BPM estimators on the title music (with the BPM cache off) and checks them against its known BPM.
+	Each one runs twice: the first run includes importing (and, for librosa, JIT-compiling) everything it needs.
+	"""
+	import numpy as np
+	from BPMCache import BPMCache
+	from BPMAnalysis import ESTIMATORS, analysis_params
+
+	song = "assets/sounds/TitleMenu/freakyMenu.ogg"
+	true_bpm = args.bpm
+	BPMCache.enabled = False
+
+	grids = {}
+	for estimator, estimate in ESTIMATORS.items():
+		params = analysis_params(estimator)
+		first, results = timed(estimate, song, params)
+		again, _ = timed(estimate, song, params)
+		grids[estimator] = np.array(results["beat_times"])
+		error = results["bpm"] - true_bpm
+		print(f"{estimator:<8} {results['bpm']:7.2f} BPM  (off by {error:+6.2f}, {abs(error) / true_bpm:6.2%})   "
+			  f"first run {first * 1000:8.1f} ms   again {again * 1000:8.1f} ms   {len(results['beat_times'])} beats")
+
+	# How far apart the two beat grids are: every librosa beat against the numpy beat nearest to it
+	offsets = grids["librosa"][:, None] - grids["numpy"][None, :]
+	nearest = offsets[np.arange(len(offsets)), np.abs(offsets).argmin(axis = 1)]
+	print(f"beat grids are {np.median(nearest) * 1000:+.1f} ms apart (median, librosa - numpy)")
+
+
+
+BENCHMARKS = {
+	"texture-cache":    bench_texture_cache,
+	"sheet-transforms": bench_sheet_transforms,
+	"atlas-slicing":    bench_atlas_slicing,
+	"bpm-estimators":   bench_bpm_estimators,
+}
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Astral Engine benchmarks")
+	parser.add_argument("benchmark", choices = sorted(BENCHMARKS))
+	parser.add_argument("--workers", type = int, nargs = "+", help = "Worker counts to try (atlas-slicing only)")
+	parser.add_argument("--bpm", type = float, default = 102.0, help = "The title music's actual BPM (bpm-estimators only)")
+	args = parser.parse_args()
+	BENCHMARKS[args.benchmark](args)
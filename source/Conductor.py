@@ -6,10 +6,19 @@
 import arcade as arc
 from StateManager import State
 from AssetManager import *
-import librosa
 import pyglet
-import numpy as np
-from dataclasses import dataclass
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from BPMCache import BPMCache
+from BPMAnalysis import analyze_song, read_sidecar
+import BPMAnalysis
+from TempoMap import TempoMap
+from SongClock import SongClock
+import heapq
+import itertools
+import math
+import multiprocessing
+import time
 
 # A measure is		 4 beats
 # A measure is also 16 steps
@@ -23,109 +32,365 @@ class BPMData:
 	measure_length_ms: 	float
 	beat_length_ms:		float
 	step_length_ms: 	float
+	beat_times: list[float] = field(default_factory = list)	# Where the analysis found every beat, in seconds (empty for overridden BPMs)
+	step_energy: list[float] = field(default_factory = list)	# How loud every step is, 0-1 (only songs analyzed ahead of time have it, see `AnalyzeSongs.py`)
+
+	@staticmethod
+	def from_bpm(bpm: float, beat_times: list[float] = None) -> "BPMData":
+		# Work out the measure/beat/step lengths from the BPM
+		beat_time_s = 60 / bpm
+		return BPMData(bpm, 1000.0 * beat_time_s * 4, 1000.0 * beat_time_s, 1000.0 * beat_time_s / 4, beat_times or [])
 
 
 class Conductor:
-	song_position: float				# Where we are in the song
+	song_position: float				# Where we are in the song (interpolated between the audio backend's reports, see `SongClock`)
+	clock: SongClock					# The smooth song clock
 	bpm_data: BPMData					# The current song's BPM
+	tempo_map: TempoMap					# The current song's BPM changes (just the one BPM, unless `set_tempo_map` says otherwise)
 	music_player: pyglet.media.Player	# The music player for this song
 	current_song: arc.Sound				# The current sound
 
-	measure_length_ms: float	# How many milliseconds a measure lasts
-	beat_length_ms: float		# How many milliseconds a beat lasts
-	step_length_ms: float		# How many milliseconds a step lasts
+	current_bpm: float			# The BPM we're at right now (what the lengths below are worked out from)
+	measure_length_ms: float	# How many milliseconds a measure lasts (at the current BPM)
+	beat_length_ms: float		# How many milliseconds a beat lasts (at the current BPM)
+	step_length_ms: float		# How many milliseconds a step lasts (at the current BPM)
+
+	current_beat: int = -1		# The last beat that was dispatched
+	current_step: int = -1		# The last step that was dispatched
+	event_time: float = 0.0		# The exact song time of the beat/step/callback being dispatched right now (see `update`)
 
-	current_beat: int = -1
-	current_step: int = -1
+	bpm_cache: dict[tuple[str, str], BPMData] = {}	# (song path, estimator) -> BPM, for all analyzed songs (backed by the on-disk `BPMCache`)
+	pending_bpm: Future = None			# The analysis the current song is waiting on, if it started with a provisional BPM
 
-	bpm_cache: dict[str, BPMData] = {}	# The BPM cache for all loaded songs
+	# Background analysis stuff
+	analysis_workers: int | None = None						# How many analysis processes to use (None -> one per CPU core)
+	_analysis_pool: ProcessPoolExecutor = None
+	_analyses: dict[tuple[str, str], Future] = {}			# (song path, estimator) -> Future, for songs that are still being analyzed
+
+	# How songs get analyzed by default: "librosa" or "numpy" (see `BPMAnalysis.ESTIMATORS`). Every analysis can pick its own too.
+	estimator: str = BPMAnalysis.DEFAULT_ESTIMATOR
 
 	def __init__(self) -> None:
+		self.clock = SongClock()
+		self.music_player = None
+		self.current_song = None
 		self.reset()
 	
 	
 	def reset(self) -> None:
 		self.song_position = 0.0
 		self.bpm_data = None
+		self.tempo_map = None
+		self.current_bpm		= 0.0
 		self.measure_length_ms	= 0.0
 		self.beat_length_ms		= 0.0
 		self.step_length_ms		= 0.0
 		self.current_beat 		= -1
 		self.current_step		= -1
+		self.pending_bpm		= None
+		self.clock.reset()
+		self._scheduled: list[list] = []		# Heap of [song time, order, callback] one-shot callbacks (see `schedule`)
+		self._schedule_order = itertools.count()
 	
-	def load_audio(self, audio: SoundAsset, bpm_override: float | None = None) -> None:
-		# Prep the conductor for playing the song
+	def load_audio(self, audio: SoundAsset, bpm_override: float | None = None, provisional_bpm: float | None = None, estimator: str | None = None) -> None:
+		"""
+		Preps the conductor for playing a song.
+
+		Args:
+			`audio` (SoundAsset): The song.
+			`bpm_override` (float | None): The song's BPM, if it's known already (skips the analysis entirely).
+			`provisional_bpm` (float | None): A BPM to keep time with while the song gets analyzed in the background (see `analyze`).
+				The conductor switches to the detected BPM on its own once the analysis is done. \n
+				Without either of them, the song gets analyzed on the spot (which blocks for a while if it was never analyzed before, and has no sidecar).
+			`estimator` (str | None): How to analyze the song: "librosa" or "numpy" (None -> `Conductor.estimator`).
+		"""
 		self.song_position	= 0.0
 		self.current_beat	= 0
 		self.current_step	= 0
+		self.pending_bpm	= None
+		self.clock.reset()
+		self._scheduled.clear()		# Callbacks were scheduled for the old song
 
-		if bpm_override == None:
-			self.bpm_data = self.getBPMData(audio)
-			target_bpm = self.bpm_data.bpm
-		else:
+		if bpm_override != None:
 			# Make the data ourselves instead of computing it like morons
-			self.bpm_cache[audio.sound_path] = BPMData(bpm_override, 0, 0, 0)
-			self.bpm_data = self.bpm_cache[audio.sound_path]
-			target_bpm = bpm_override
-		self.computeMeasureTimes(audio, target_bpm)
-		# Load the step/beat/measure times
-		self.measure_length_ms 	= self.bpm_cache[audio.sound_path].measure_length_ms
-		self.beat_length_ms 		= self.bpm_cache[audio.sound_path].beat_length_ms
-		self.step_length_ms 		= self.bpm_cache[audio.sound_path].step_length_ms
+			self.set_bpm_data(BPMData.from_bpm(bpm_override))
+		elif provisional_bpm != None:
+			self.pending_bpm = self.analyze(audio, estimator)
+			if self.pending_bpm.done():
+				self.apply_pending_bpm()
+			else:
+				self.set_bpm_data(BPMData.from_bpm(provisional_bpm))
+		else:
+			self.set_bpm_data(self.getBPMData(audio, estimator))
 	
 	
-	def play_audio(self, audio: SoundAsset, bpm_override: float | None = None) -> None:
+	def play_audio(self, audio: SoundAsset, bpm_override: float | None = None, provisional_bpm: float | None = None, estimator: str | None = None) -> None:
 		# Load the step/beat/measure times and play the audio
-		self.load_audio(audio, bpm_override = bpm_override)
+		self.load_audio(audio, bpm_override = bpm_override, provisional_bpm = provisional_bpm, estimator = estimator)
 		self.current_song = audio.sound
 		self.music_player = arc.sound.play_sound(audio.sound)
+		self.clock.start()
+
+
+	def pause(self) -> None:
+		# Pause the song, and the beats along with it
+		if self.music_player != None:
+			self.music_player.pause()
+		self.clock.pause()
+
+
+	def resume(self) -> None:
+		if self.music_player != None:
+			self.music_player.play()
+		self.clock.resume()
+
+
+	def set_bpm_data(self, bpm_data: BPMData) -> None:
+		# Switch to another beat grid (a constant one)
+		self.bpm_data = bpm_data
+		self.set_tempo_map(TempoMap(bpm_data.bpm))
+
+
+	def set_tempo_map(self, tempo_map: TempoMap) -> None:
+		"""
+		Switches to a beat grid with BPM changes (e.g. a chart's), keeping the song's position. \n
+		The beat/step counts jump straight to where the song is on the new grid, without dispatching anything:
+		only actual playback gets its beats caught up on (see `update`).
+
+		Args:
+			`tempo_map` (TempoMap): The song's BPM changes.
+		"""
+		self.tempo_map = tempo_map
+		self._set_lengths(tempo_map.bpm_at(self.song_position))
+		beat = tempo_map.beat_at(self.song_position)
+		self.current_beat = math.floor(beat)
+		self.current_step = math.floor(beat * 4)
+
+
+	def _set_lengths(self, bpm: float) -> None:
+		self.current_bpm = bpm
+		beat_time_s = 60 / bpm
+		self.measure_length_ms	= 1000.0 * beat_time_s * 4
+		self.beat_length_ms		= 1000.0 * beat_time_s
+		self.step_length_ms		= 1000.0 * beat_time_s / 4
+
+
+	def apply_pending_bpm(self) -> bool:
+		"""
+		Switches to the detected BPM if the background analysis started by `load_audio` is done (`update` calls this every frame).
+
+		Returns:
+			`bool`: Whether the beat grid changed.
+		"""
+		if self.pending_bpm == None or not self.pending_bpm.done():
+			return False
+		future, self.pending_bpm = self.pending_bpm, None
+		try:
+			self.set_bpm_data(future.result())
+		except Exception as e:
+			# Keep the provisional grid, it's better than nothing
+			print(f"BPM analysis failed: {e}")
+			return False
+		return True
+
+
+	@classmethod
+	def analysis_params(cls, estimator: str | None = None) -> dict:
+		"""
+		Args:
+			`estimator` (str | None): Which of the `BPMAnalysis.ESTIMATORS` to use (None -> `Conductor.estimator`).
+		Returns:
+			`dict`: Everything that changes what the analysis finds (see `BPMAnalysis.analysis_params`).
+		"""
+		return BPMAnalysis.analysis_params(estimator or cls.estimator)
+
+
+	@staticmethod
+	def stored_analysis(path: str, params: dict) -> dict | None:
+		"""
+		Looks for a song's analysis that was done before: first in its sidecar (made ahead of time by `AnalyzeSongs.py`,
+		as long as it was made with the same parameters), then in the `BPMCache`.
+
+		Returns:
+			`dict | None`: The analysis (as the fields of a `BPMData`), or None if the song still has to be analyzed.
+		"""
+		return read_sidecar(path, params) or BPMCache.read(path, params)
+
+
+	@classmethod
+	def analyze(cls, audio: SoundAsset, estimator: str | None = None) -> Future:
+		"""
+		Starts analyzing a song's BPM in a worker process, so the window never stalls (the analysis is CPU-bound, so threads wouldn't cut it). \n
+		Songs that were analyzed before (in this run or, thanks to the `BPMCache`, any earlier one) resolve right away,
+		and asking for a song that's still being analyzed shares the same future.
+
+		Args:
+			`audio` (SoundAsset): The song to analyze.
+			`estimator` (str | None): Which of the `BPMAnalysis.ESTIMATORS` to use (None -> `Conductor.estimator`).
+		Returns:
+			`Future[BPMData]`: A future resolving to the song's BPM data.
+		"""
+		params = cls.analysis_params(estimator)
+		path = audio.sound_path
+		key = (path, params["estimator"])
+		future = cls._analyses.get(key)
+		if future != None:
+			return future
+
+		future = Future()
+		data = cls.bpm_cache.get(key)
+		if data == None:
+			stored = cls.stored_analysis(path, params)
+			if stored != None:
+				data = cls.bpm_cache[key] = BPMData(**stored)
+		if data != None:
+			future.set_result(data)
+			return future
+
+		if cls._analysis_pool == None:
+			# Spawn fresh workers instead of forking: a fork would copy the whole game into them, GL context, audio thread,
+			# asset loader threads and their locks included (and any lock held mid-fork stays locked forever in the child)
+			cls._analysis_pool = ProcessPoolExecutor(max_workers = cls.analysis_workers, mp_context = multiprocessing.get_context("spawn"))
+
+		def analysis_done(raw: Future) -> None:
+			cls._analyses.pop(key, None)
+			try:
+				cls.bpm_cache[key] = BPMData(**raw.result())
+			except Exception as e:
+				future.set_exception(e)
+				return
+			future.set_result(cls.bpm_cache[key])
+
+		cls._analyses[key] = future
+		cls._analysis_pool.submit(analyze_song, path, params).add_done_callback(analysis_done)
+		return future
+
+
+	@classmethod
+	def shutdown_analysis(cls) -> None:
+		# Don't keep the game from closing over songs nobody's waiting for anymore
+		if cls._analysis_pool != None:
+			cls._analysis_pool.shutdown(wait = False, cancel_futures = True)
+			cls._analysis_pool = None
 
 	
-	def getBPMData(self, audio: SoundAsset) -> BPMData:
-		# Load the sound using librosa and estimate the BPM (if we didn't already)
-		if self.bpm_cache.get(audio.sound_path) == None:
-			# Downsample and cut the song so we can quickly get its BPM faster
-			y, sr = librosa.load(audio.sound_path, sr=11025, mono=True)
-			y, _ = librosa.effects.trim(y, top_db=20)
-
-			onset_env = librosa.onset.onset_strength(y=y, sr=sr)
-			_, beats = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr)
-			beat_times = librosa.frames_to_time(beats, sr=sr)
-			intervals = np.diff(beat_times)
-			# Calculate the average BPM for the song and cache it
-			bpms = 60 / intervals
-			self.bpm_cache[audio.sound_path] = BPMData(np.median(bpms), 0, 0, 0)
-
-		return self.bpm_cache[audio.sound_path]
+	def getBPMData(self, audio: SoundAsset, estimator: str | None = None) -> BPMData:
+		# Estimate the BPM (if we didn't already, in this run or any earlier one)
+		params = self.analysis_params(estimator)
+		key = (audio.sound_path, params["estimator"])
+		if self.bpm_cache.get(key) == None:
+			# Already being analyzed in the background? Just wait for it
+			future = self._analyses.get(key)
+			if future != None:
+				return future.result()
+			stored = self.stored_analysis(audio.sound_path, params)
+			self.bpm_cache[key] = BPMData(**(stored or analyze_song(audio.sound_path, params)))
+
+		return self.bpm_cache[key]
+		
 	
+	@property
+	def drift(self) -> float:
+		"""How far the song clock is off from the audio backend, in seconds (positive -> the clock is behind)."""
+		return self.clock.drift
+
 
+	@property
+	def playing(self) -> bool:
+		"""Whether the song is actually playing (not paused, ended or stalled)."""
+		return self.clock.running
 	
-	def computeMeasureTimes(self, audio: SoundAsset, bpm_override: float | None = None) -> None:
-		if bpm_override == None:
-			bpm_data = self.getBPMData(audio)
-			beat_time_s = 60 / bpm_data.bpm
-		else:
-			beat_time_s = 60 / bpm_override
-		measure_time_s	= beat_time_s * 4
-		step_time_s		= beat_time_s / 4
-		# Store the values in the BPM cache
-		self.bpm_cache[audio.sound_path].measure_length_ms 	= 1000.0 * measure_time_s
-		self.bpm_cache[audio.sound_path].beat_length_ms 	= 1000.0 * beat_time_s
-		self.bpm_cache[audio.sound_path].step_length_ms		= 1000.0 * step_time_s
-		
 	
-	def update(self) -> tuple[bool, bool]:
-		self.song_position = self.current_song.get_stream_position(self.music_player)
+	#======== Scheduling ========#
+
+	def schedule(self, song_time: float, callback) -> list:
+		"""
+		Runs `callback()` once, as soon as the song reaches `song_time` (in seconds). Callbacks run in time order, interleaved with
+		the beats and steps (see `update`), and `event_time` is set to `song_time` while they run.
+
+		Args:
+			`song_time` (float): When to run the callback, in seconds.
+			`callback` (Callable[[], None]): The callback.
+		Returns:
+			`list`: A handle for `cancel`.
+		"""
+		entry = [song_time, next(self._schedule_order), callback]
+		heapq.heappush(self._scheduled, entry)
+		return entry
+
+	def schedule_beat(self, beat: float, callback) -> list:
+		"""Same as `schedule`, but at a (fractional) beat instead of a time."""
+		return self.schedule(self.tempo_map.time_at(beat), callback)
+
+	def cancel(self, handle: list) -> None:
+		"""Makes sure a scheduled callback never runs."""
+		handle[2] = None
+	
+	
+	def update(self, state: State | None = None) -> tuple[bool, bool]:
+		"""
+		Advances the song position and dispatches everything it went past, in order: every step (`state.step_hit()`), every beat
+		(`state.beat_hit()`, right after the step it lands on) and every scheduled callback. Even if a hitch made the song skip a few
+		beats since the last frame, each of them still gets dispatched, with `current_beat`/`current_step` and `event_time` set to
+		that exact beat/step while its hook runs.
+
+		Args:
+			`state` (State | None): Whose `beat_hit`/`step_hit` to call.
+		Returns:
+			`tuple[bool, bool]`: Whether any beat and any step got hit this frame.
+		"""
+		self.apply_pending_bpm()
+		# Only check in with the audio backend every now and then, the clock keeps time in between
+		now = time.perf_counter()
+		if self.clock.needs_report(now):
+			self.clock.report(self.current_song.get_stream_position(self.music_player), now)
+		self.song_position = self.clock.position(now)
 
-		# Compute the current beat and step positions
-		new_beat = int(self.song_position / (self.beat_length_ms / 1000.0))
-		new_step = int(self.song_position / (self.step_length_ms / 1000.0))
+		# Compute the current beat and step positions (binary searching the tempo map, so BPM changes don't cost anything)
+		beat = self.tempo_map.beat_at(self.song_position)
+		new_beat = math.floor(beat)
+		new_step = math.floor(beat * 4)
+		# Keep the lengths in sync with the BPM we're at
+		bpm = self.tempo_map.bpm_at(self.song_position)
+		if bpm != self.current_bpm:
+			self._set_lengths(bpm)
 
 		beat_just_hit = (new_beat != self.current_beat)
 		step_just_hit = (new_step != self.current_step)
 
-		self.current_beat = new_beat
-		self.current_step = new_step
+		# Went backwards (looped or seeked)? Nothing to dispatch, just count from there
+		if new_beat < self.current_beat or new_step < self.current_step:
+			self.current_beat = new_beat
+			self.current_step = new_step
+		self._dispatch(new_beat, new_step, state)
 		
 		return beat_just_hit, step_just_hit
 
+
+	def _dispatch(self, new_beat: int, new_step: int, state: State | None) -> None:
+		# Every step and beat we went past since last time, with the exact time it happened at (steps go right before their beats)
+		crossed = [(self.tempo_map.time_at_step(step), 0, step) for step in range(self.current_step + 1, new_step + 1)]
+		crossed += [(self.tempo_map.time_at(beat), 1, beat) for beat in range(self.current_beat + 1, new_beat + 1)]
+		crossed.sort()
+
+		i = 0
+		while True:
+			# Scheduled callbacks that are due go in between, wherever their time says (callbacks can schedule more of them too)
+			scheduled_due = bool(self._scheduled) and self._scheduled[0][0] <= self.song_position
+			if scheduled_due and (i == len(crossed) or self._scheduled[0][0] < crossed[i][0]):
+				self.event_time, _, callback = heapq.heappop(self._scheduled)
+				if callback != None:
+					callback()
+				continue
+			if i == len(crossed):
+				break
+
+			self.event_time, kind, number = crossed[i]
+			i += 1
+			if kind == 0:
+				self.current_step = number
+				if state != None: state.step_hit()
+			else:
+				self.current_beat = number
+				if state != None: state.beat_hit()
+
@@ -5,8 +5,17 @@
 #   - the keyboard
 #   - a replay
 #   - or any other valid source
+#
+# There are three ways to consume input:
+#   - ask about an action (`is_held`, `just_pressed`, `just_released`...), answered straight from a per-action state table
+#   - subscribe a handler to an (action, event type) pair, which gets called with every matching event
+#   - `poll()` the raw events of the last update
 
 from .InputStuff import *
+from .Keybinds   import *
+from .Replay     import *
+from array import array
+import math
 
 
 #====== InputManager ======#
@@ -15,22 +24,133 @@ class InputManager:
 	"""
 	The main input handling class for the game. <br>
 	Handles multiple sources and centralizes event handling.
+
+	<h2>Action state table:</h2>
+	Every action gets an index (see `action_index`), and its state lives at that index in flat arrays:
+	`held` (whether it's held down), `pressed_at`/`released_at` (the time of its last press/release) and
+	`pressed_update`/`released_update` (the update that happened in, which is what `just_pressed`/`just_released` check).
 	"""
 	def __init__(self):
 		self.sources: list[InputSource] = []
 		self.queue: list[InputEvent]    = []
-	
+		self.recorder: InputRecorder    = None
+
+		self.update_count = 0
+		self.action_index: dict[str, int] = {}
+		self.held            = bytearray()
+		self.pressed_at      = array("d")
+		self.released_at     = array("d")
+		self.pressed_update  = array("q")
+		self.released_update = array("q")
+		for action in Keybind.bindings:
+			self._add_action(action)
+
+		self.subscribers: dict[tuple[str, str], tuple] = {}     # (action, event type) -> handlers
+
 
 	def add_source(self, source: InputSource):
 		self.sources.append(source)
-	
+
+
+	def start_recording(self, path: str):
+		# Record every event from every source into `path`, until `stop_recording` (play it back with a `ReplaySource`)
+		self.stop_recording()
+		self.recorder = InputRecorder(path)
+
+	def stop_recording(self):
+		if self.recorder != None:
+			self.recorder.close()
+			self.recorder = None
+
 
 	def update(self, current_time: float):
+		# Only keep this update's events (nobody has to poll, and events nobody polled shouldn't pile up)
+		self.queue = []
+		self.update_count += 1
 		for source in self.sources:
-			self.queue.extend(source.poll(current_time))
-	
+			events = source.poll(current_time)
+			if self.recorder != None:
+				self.recorder.record(events)
+			self.queue.extend(events)
+
+		for event in self.queue:
+			self._apply(event)
+			handlers = self.subscribers.get((event.action, event.act_type))
+			if handlers:
+				for handler in handlers:
+					handler(event)
+
 
 	def poll(self):
 		events = self.queue
 		self.queue = []     # Clear the queue so we don't read events from past frames
 		return events
+
+
+	#====== Action state table ======#
+
+	def _add_action(self, action: str) -> int:
+		# Actions nobody bound a key to (like a replay's) still get a slot
+		index = self.action_index[action] = len(self.held)
+		self.held.append(0)
+		self.pressed_at.append(-math.inf)
+		self.released_at.append(-math.inf)
+		self.pressed_update.append(-1)
+		self.released_update.append(-1)
+		return index
+
+	def _apply(self, event: InputEvent):
+		index = self.action_index.get(event.action)
+		if index == None:
+			index = self._add_action(event.action)
+		if event.act_type == InputEvent.Pressed:
+			self.held[index] = 1
+			self.pressed_at[index]     = event.time
+			self.pressed_update[index] = self.update_count
+		else:
+			self.held[index] = 0
+			self.released_at[index]     = event.time
+			self.released_update[index] = self.update_count
+
+	def is_held(self, action: str) -> bool:
+		index = self.action_index.get(action)
+		return index != None and self.held[index] == 1
+
+	def just_pressed(self, action: str) -> bool:
+		# Whether the action got pressed in the last update
+		index = self.action_index.get(action)
+		return index != None and self.pressed_update[index] == self.update_count
+
+	def just_released(self, action: str) -> bool:
+		# Whether the action got released in the last update
+		index = self.action_index.get(action)
+		return index != None and self.released_update[index] == self.update_count
+
+	def last_press(self, action: str) -> float:
+		# The time of the action's last press (-inf if it never got pressed)
+		index = self.action_index.get(action)
+		return self.pressed_at[index] if index != None else -math.inf
+
+	def last_release(self, action: str) -> float:
+		# The time of the action's last release (-inf if it never got released)
+		index = self.action_index.get(action)
+		return self.released_at[index] if index != None else -math.inf
+
+
+	#====== Subscriptions ======#
+
+	def subscribe(self, action: str, act_type: str, handler):
+		"""
+		Calls `handler(event)` for every event of `action` with type `act_type` (`InputEvent.Pressed`/`InputEvent.Released`), during `update`.
+		"""
+		key = (action, act_type)
+		self.subscribers[key] = self.subscribers.get(key, ()) + (handler,)
+		return handler
+
+	def unsubscribe(self, action: str, act_type: str, handler):
+		key = (action, act_type)
+		handlers = tuple(h for h in self.subscribers.get(key, ()) if h != handler)
+		if handlers:
+			self.subscribers[key] = handlers
+		else:
+			self.subscribers.pop(key, None)
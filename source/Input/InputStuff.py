@@ -23,6 +23,9 @@ class InputEvent:
 	"""
 	Represents an input event.
 	"""
+	# No per-event `__dict__`: gameplay makes thousands of these per song
+	__slots__ = ("source", "time", "action", "act_type")
+
 	def __init__(self, src: InputSource, time: float, action: str, act_type: str):
 		self.source   = src
 		self.time     = time
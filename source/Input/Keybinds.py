@@ -23,14 +23,38 @@ class Keybind:
 		Return:      [ arc.key.ESCAPE,  arc.key.Z ]
 	}
 
+	# Reverse index of `bindings`: key -> every action bound to it, so key events don't have to scan every binding.
+	# It's rebuilt by `set_binding`; if you edit `bindings` by hand, call `rebuild_index()` afterwards.
+	actions_by_key: dict[int, tuple[str, ...]] = {}
+
+	@staticmethod
+	def rebuild_index():
+		index = {}
+		for action, keys in Keybind.bindings.items():
+			for key in keys:
+				index[key] = index.get(key, ()) + (action,)
+		Keybind.actions_by_key = index
+
+	@staticmethod
+	def set_binding(bind: str, keys: list[int]):
+		# Rebinds an action (and keeps the index in sync)
+		Keybind.bindings[bind] = list(keys)
+		Keybind.rebuild_index()
+
+	@staticmethod
+	def actions_for(key) -> tuple[str, ...]:
+		# Every action bound to `key` (usually just the one)
+		return Keybind.actions_by_key.get(key, ())
+
 	@staticmethod
 	def check(key, bind: str):
-		for keybind in Keybind.bindings.get(bind, []):
-			if key == keybind: return True
-		return False
+		return bind in Keybind.actions_by_key.get(key, ())
 	
 	@staticmethod
 	def get_string_repr_for_bind(bind: str):
 		# This sucks, but I was a little lazy :/
 		# It joins all the keybind names using Pyglet's `symbol_string` function. Thx pyglet <3
-		return " / ".join(arc.pyglet.window.key.symbol_string(key) for key in Keybind.bindings.get(bind, []))
\ No newline at end of file
+		return " / ".join(arc.pyglet.window.key.symbol_string(key) for key in Keybind.bindings.get(bind, []))
+
+
+Keybind.rebuild_index()
@@ -1,22 +1,44 @@
 from .InputStuff import *
 from .Keybinds   import *
+import time as _time
 
 class KeyboardSource(InputSource):
+	"""
+	Turns keyboard events into input events. <br>
+	Every key event gets timestamped the moment it arrives (with `time.perf_counter_ns`), not with the time of the frame it's
+	handled in, so presses within the same frame still get their own, exact times. That timestamp is mapped into whichever
+	timebase the game is polling with (`main_time` or `song_time`), anchored at the last `poll`.
+	"""
 	def __init__(self):
 		self.pending = []
+		# The last poll's time, and when it happened
+		self.anchor_time = 0.0
+		self.anchor_ns   = _time.perf_counter_ns()
 
-	def on_key_press(self, key, modifiers, time):
-		# Check all Keybind actions
-		for action, keys in Keybind.bindings.items():
-			if key in keys:
+	def event_time(self) -> float:
+		# Where the timebase is right now: the last poll's time, plus however long it's been since
+		return self.anchor_time + (_time.perf_counter_ns() - self.anchor_ns) / 1e9
+
+	def on_key_press(self, key, modifiers, time: float | None = None):
+		# Look up which actions the key is bound to (see `Keybind.actions_by_key`)
+		actions = Keybind.actions_by_key.get(key, ())
+		if actions:
+			time = self.event_time() if time == None else time
+			for action in actions:
 				self.pending.append(InputEvent(self, time, action, InputEvent.Pressed))
 
-	def on_key_release(self, key, modifiers, time):
-		for action, keys in Keybind.bindings.items():
-			if key in keys:
+	def on_key_release(self, key, modifiers, time: float | None = None):
+		actions = Keybind.actions_by_key.get(key, ())
+		if actions:
+			time = self.event_time() if time == None else time
+			for action in actions:
 				self.pending.append(InputEvent(self, time, action, InputEvent.Released))
-	
+
 	def poll(self, current_time):
+		# Re-anchor, so the timebase can't drift away from the game's (and switching between them just works)
+		self.anchor_time = current_time
+		self.anchor_ns   = _time.perf_counter_ns()
+
 		events = self.pending
 		self.pending = []
-		return events
\ No newline at end of file
+		return events
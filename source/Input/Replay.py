@@ -0,0 +1,143 @@
+# Friday Night Funkin' Astral Engine
+
+### Replay module
+# This module defines input recordings: a recorder that streams every input event to a file, and an input source that plays one back.
+# Recordings are compact binary files (little endian):
+#   header:  magic, version, action table size, then the action table (UTF-8 JSON list of action names)
+#   records: one fixed-width record per event (float64 time, uint16 action index, uint16 event type)
+# Actions that show up after the recording started (new bindings, a replay's own actions...) get an action definition record
+# right before their first event: event type `DEFINE_ACTION`, the new action's index, the name's length in the time field,
+# then the UTF-8 name itself, padded to a whole number of records.
+# Recordings are streamed as they go, so a recording of a crashed session is still readable up to the crash.
+
+from .InputStuff import *
+from .Keybinds   import *
+import json
+import mmap
+import os
+import struct
+
+HEADER  = struct.Struct("<4sHI")
+RECORD  = struct.Struct("<dHH")
+MAGIC   = b"ASTI"
+VERSION = 2
+
+DEFINE_ACTION = 0xFFFF      # The event type of action definition records
+
+EVENT_TYPES = (InputEvent.Pressed, InputEvent.Released)      # Event type <-> index in a record
+
+
+#====== InputRecorder ======#
+
+class InputRecorder:
+	"""
+	Streams input events into a recording file (see `ReplaySource`). <br>
+	Use it through `InputManager.start_recording`, or as a context manager.
+	"""
+	def __init__(self, path: str, actions: list[str] | None = None):
+		self.path    = path
+		self.actions = list(actions or Keybind.bindings)
+		self.action_ids = {action: i for i, action in enumerate(self.actions)}
+		self.event_ids  = {act_type: i for i, act_type in enumerate(EVENT_TYPES)}
+		self.count = 0
+
+		table = json.dumps(self.actions).encode("utf-8")
+		self.file = open(path, "wb")
+		self.file.write(HEADER.pack(MAGIC, VERSION, len(table)))
+		self.file.write(table)
+
+	def _define_action(self, action: str) -> bytes:
+		# Give an action that's not in the table yet the next index (see the module comment for the layout)
+		index = self.action_ids[action] = len(self.actions)
+		self.actions.append(action)
+		name = action.encode("utf-8")
+		padding = -len(name) % RECORD.size
+		return RECORD.pack(len(name), index, DEFINE_ACTION) + name + b"\0" * padding
+
+	def record(self, events: list[InputEvent]):
+		if not events:
+			return
+		records = []
+		for event in events:
+			action_id = self.action_ids.get(event.action)
+			if action_id == None:
+				records.append(self._define_action(event.action))
+				action_id = self.action_ids[event.action]
+			records.append(RECORD.pack(event.time, action_id, self.event_ids[event.act_type]))
+		self.file.write(b"".join(records))
+		self.file.flush()    # Don't lose what's left in the buffer if the game crashes, those are the recordings we want the most
+		self.count += len(events)
+
+	def close(self):
+		if not self.file.closed:
+			self.file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+#====== ReplaySource ======#
+
+class ReplaySource(InputSource):
+	"""
+	Plays a recording back (see `InputRecorder`), as if it was being played live. <br>
+	The file gets memory-mapped, and a cursor remembers where the last poll stopped, so every poll only reads the new events.
+	"""
+	def __init__(self, path: str):
+		with open(path, "rb") as f:
+			# (empty files can't be mapped at all)
+			size = os.fstat(f.fileno()).st_size
+			self.data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) if size >= HEADER.size else None
+
+		magic = version = None
+		if self.data != None:
+			magic, version, table_size = HEADER.unpack_from(self.data, 0)
+		if magic != MAGIC or version != VERSION or HEADER.size + table_size > size:
+			if self.data != None:
+				self.data.close()
+			raise ValueError(f"{path} isn't an input recording this version can play (got {magic!r} v{version}, {size} bytes)")
+		try:
+			self.actions = json.loads(self.data[HEADER.size:HEADER.size + table_size].decode("utf-8"))
+		except (UnicodeDecodeError, json.JSONDecodeError):
+			self.data.close()
+			raise ValueError(f"{path} isn't an input recording this version can play (its action table is broken)")
+		self.table_size = len(self.actions)     # (the rest of the actions get defined along the way)
+
+		self.start  = HEADER.size + table_size
+		# A recording that got cut off mid-record just loses that last record
+		self.end    = self.start + (len(self.data) - self.start) // RECORD.size * RECORD.size
+		self.cursor = self.start
+
+	@property
+	def finished(self) -> bool:
+		return self.cursor >= self.end
+
+	def rewind(self):
+		self.cursor = self.start
+		del self.actions[self.table_size:]      # They'll get defined again on the way
+
+	def poll(self, current_time: float):
+		events = []
+		while self.cursor < self.end:
+			time, action, act_type = RECORD.unpack_from(self.data, self.cursor)
+			if act_type == DEFINE_ACTION:
+				# A new action: its name follows (the time field holds its length)
+				name_start = self.cursor + RECORD.size
+				name_end   = name_start + int(time)
+				if name_end > self.end:
+					break		# Cut off mid-definition
+				del self.actions[action:]
+				self.actions.append(self.data[name_start:name_end].decode("utf-8"))
+				self.cursor = name_start + (int(time) + RECORD.size - 1) // RECORD.size * RECORD.size
+				continue
+			if time > current_time:
+				break
+			events.append(InputEvent(self, time, self.actions[action], EVENT_TYPES[act_type]))
+			self.cursor += RECORD.size
+		return events
+
+	def close(self):
+		self.data.close()
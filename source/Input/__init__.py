@@ -1,5 +1,6 @@
 from .InputManager import *
 from .InputStuff   import *
 from .Keybinds     import *
+from .Replay       import *
 
 from .KeyboardSource import *
\ No newline at end of file
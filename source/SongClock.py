@@ -0,0 +1,144 @@
+# Friday Night Funkin' Astral Engine
+
+### Song Clock
+# This module keeps a smooth song position between the audio backend's position reports.
+# Backends only report the position in coarse steps (whenever they finish a buffer), which makes anything timed off
+# of them jittery. The song clock runs off of `time.perf_counter` instead, and only leans on the backend to stay in sync.
+
+from collections import deque
+import math
+import time
+
+
+class SongClock:
+	"""
+	An interpolated song clock.
+	Attributes:
+		`drift` (float): How far the clock is off from the backend, in seconds (positive -> the clock is behind).
+		`running` (bool): Whether the clock is ticking.
+		`stalled` (bool): Whether the clock stopped because the backend did (the song ended, or the stream ran dry). It starts
+			again on its own once the backend moves.
+		`query_interval` (float): How often the backend needs to be asked for the position, in seconds (see `needs_report`).
+		`resync_threshold` (float): How much drift is tolerated before the clock starts easing back in sync, in seconds.
+		`resync_rate` (float): How much of the drift gets corrected on every report once it's past the threshold (0-1).
+		`snap_threshold` (float): How far off a single report has to be for the clock to jump straight to it (seeks, loops), in seconds.
+			It's also how long the backend can report the same position before the clock counts playback as stopped.
+	"""
+	query_interval: float	= 0.1
+	resync_threshold: float	= 0.001
+	resync_rate: float		= 0.25
+	snap_threshold: float	= 0.25
+	DRIFT_WINDOW: int		= 16		# How many recent reports the drift is measured over
+
+	def __init__(self) -> None:
+		self.reset()
+
+	def reset(self, position: float = 0.0) -> None:
+		"""Stops the clock at `position` (in seconds)."""
+		self._base_position	= position
+		self._base_time		= time.perf_counter()
+		self._last_position	= position
+		self._last_report	= None
+		self._report_since	= self._base_time		# When the backend started reporting `_last_report`
+		self._last_query	= -math.inf
+		self._samples		= deque(maxlen = self.DRIFT_WINDOW)
+		self.drift			= 0.0
+		self.running		= False
+		self.stalled		= False
+
+	def start(self, position: float = 0.0) -> None:
+		"""Starts the clock from `position` (in seconds)."""
+		self.reset(position)
+		self.running = True
+
+	def pause(self) -> None:
+		self._base_position = self.position()
+		self._base_time		= time.perf_counter()
+		self.running		= False
+		self.stalled		= False
+
+	def resume(self) -> None:
+		self._base_time		= time.perf_counter()
+		self._report_since	= self._base_time		# (the backend was paused too, so it not moving until now says nothing)
+		self.running		= True
+		self.stalled		= False
+
+
+	def _jump(self, position: float, now: float) -> None:
+		# Go straight to `position`, forgetting about the drift (even if that's backwards)
+		self._base_position	= position
+		self._base_time		= now
+		self._last_position	= position
+		self._samples.clear()
+		self.drift			= 0.0
+
+
+	def _raw_position(self, now: float) -> float:
+		if not self.running:
+			return self._base_position
+		return self._base_position + (now - self._base_time)
+
+	def position(self, now: float | None = None) -> float:
+		"""
+		Returns the interpolated song position, in seconds. It never goes backwards (except when the clock snaps to a report).
+
+		Args:
+			`now` (float | None): The current `time.perf_counter()` (pass it in if you already have it).
+		"""
+		now = time.perf_counter() if now == None else now
+		self._last_position = max(self._last_position, self._raw_position(now))
+		return self._last_position
+
+
+	def needs_report(self, now: float | None = None) -> bool:
+		"""Returns whether it's time to ask the backend for the position again (so it doesn't get asked every single frame)."""
+		now = time.perf_counter() if now == None else now
+		return now - self._last_query >= self.query_interval
+
+	def report(self, position: float, now: float | None = None) -> None:
+		"""
+		Feeds a position report from the audio backend to the clock, which then eases back in sync if it drifted too far away.
+
+		Args:
+			`position` (float): The position the backend reported, in seconds.
+			`now` (float | None): The `time.perf_counter()` of the report.
+		"""
+		now = time.perf_counter() if now == None else now
+		self._last_query = now
+		if position == self._last_report:
+			# The backend didn't move since last time. That's normal for a buffer or so (the report is just stale by now),
+			# but if it stays put for longer, playback stopped (the song ended, or the stream ran dry): stop there too
+			if self.running and now - self._report_since >= self.snap_threshold:
+				self._jump(position, now)
+				self.running = False
+				self.stalled = True
+			return
+		self._last_report  = position
+		self._report_since = now
+
+		if self.stalled:
+			# Playback picked back up
+			self._jump(position, now)
+			self.running = True
+			self.stalled = False
+			return
+		if not self.running:
+			# Paused on purpose, the backend doesn't get a say until `resume`
+			return
+
+		sample = position - self._raw_position(now)
+		if abs(sample) >= self.snap_threshold:
+			# Way off: the song got seeked or looped, so jump straight there
+			self._jump(position, now)
+			return
+
+		# Backends report where the last buffer they finished was, so every report is somewhere between spot on and a buffer late.
+		# The most ahead of the recent ones is the closest to the truth.
+		self._samples.append(sample)
+		self.drift = max(self._samples)
+		if abs(self.drift) >= self.resync_threshold:
+			# Ease back in sync instead of jumping, so beats and animations don't stutter
+			correction = self.drift * self.resync_rate
+			self._base_position += correction
+			self._samples = deque((s - correction for s in self._samples), maxlen = self.DRIFT_WINDOW)
+			self.drift -= correction
@@ -0,0 +1,344 @@
+# Friday Night Funkin' Astral Engine
+
+### Sprite Packer
+# This module packs the images a state declares (static images and atlas frames alike) into one or a few shared spritesheets.
+# The sheets are written as regular Sparrow atlases (PNG + XML), along with an index of where every original image ended up.
+# `ImageAsset.load` checks that index, so loading an original image slices it out of its shared sheet instead of opening
+# (and decoding) its own file, and everything a state draws together lives in the same texture.
+#
+# Pack every state's `preload_manifest` images with:
+#   python source/SpritePacker.py [output folder]
+#
+# Images that aren't in the index (or that changed since they were packed) get loaded from their own files like always.
+
+from xml.etree import ElementTree as ET
+from PIL import Image
+import importlib
+import io
+import json
+import os
+import pkgutil
+import sys
+import threading
+from collections import OrderedDict
+import weakref
+from AssetPack import AssetPack, normalize_path
+
+
+INDEX_FILE = "index.json"
+
+
+###============ Skyline Bin Packer ============###
+
+class Skyline:
+	"""
+	A skyline bottom-left bin packer for a single sheet: every rectangle goes wherever its top edge ends up the lowest.
+	Attributes:
+		`width` (int): The maximum width of the sheet.
+		`height` (int): The maximum height of the sheet.
+		`used_width` (int): How wide the packed rectangles actually go.
+		`used_height` (int): How tall the packed rectangles actually go.
+	"""
+	def __init__(self, width: int, height: int) -> None:
+		self.width = width
+		self.height = height
+		self.used_width = 0
+		self.used_height = 0
+		self.segments: list[list[int]] = [[0, 0, width]]		# x, y, width of every skyline segment, left to right
+
+	def _fit(self, index: int, w: int, h: int) -> int | None:
+		# Where a w*h rectangle would have to sit if its left edge starts at segment `index`
+		x = self.segments[index][0]
+		if x + w > self.width:
+			return None
+		y = 0
+		remaining = w
+		while remaining > 0:
+			_, seg_y, seg_w = self.segments[index]
+			y = max(y, seg_y)
+			remaining -= seg_w
+			index += 1
+		return y if y + h <= self.height else None
+
+	def insert(self, w: int, h: int) -> tuple[int, int] | None:
+		"""
+		Places a rectangle on the sheet.
+
+		Returns:
+			`tuple[int, int] | None`: The top-left corner of the rectangle, or None if it doesn't fit anymore.
+		"""
+		best = None
+		for i, (x, _, _) in enumerate(self.segments):
+			y = self._fit(i, w, h)
+			if y != None and (best == None or (y + h, x) < (best[1] + h, best[0])):
+				best = (x, y, i)
+		if best == None:
+			return None
+
+		x, y, i = best
+		# Raise the skyline over the new rectangle, eating into the segments it covers
+		self.segments.insert(i, [x, y + h, w])
+		j = i + 1
+		while j < len(self.segments):
+			end = self.segments[j - 1][0] + self.segments[j - 1][2]
+			seg = self.segments[j]
+			if seg[0] >= end:
+				break
+			seg[2] -= end - seg[0]
+			seg[0] = end
+			if seg[2] > 0:
+				break
+			del self.segments[j]
+		# Neighbours at the same height are really one segment
+		j = 0
+		while j < len(self.segments) - 1:
+			if self.segments[j][1] == self.segments[j + 1][1]:
+				self.segments[j][2] += self.segments[j + 1][2]
+				del self.segments[j + 1]
+			else:
+				j += 1
+
+		self.used_width  = max(self.used_width, x + w)
+		self.used_height = max(self.used_height, y + h)
+		return x, y
+
+	def snapshot(self) -> tuple:
+		return [seg[:] for seg in self.segments], self.used_width, self.used_height
+
+	def restore(self, snapshot: tuple) -> None:
+		segments, self.used_width, self.used_height = snapshot
+		self.segments = [seg[:] for seg in segments]
+
+
+
+###============ Sprite Packer Class ============###
+
+class SpritePacker:
+	"""
+	The index of packed sheets (if any was loaded).
+	Attributes:
+		`entries` (dict[str, dict]): Maps every packed image path to where its frames are: `{"sheet", "names", "rects", "frames", "mtimes"}`,
+		with `rects` being the `(x, y, width, height)` of every frame *in the packed sheet* and `frames` in the `parse_xml_atlas` format.
+		`keep_sheets` (int): How many recently used sheets stay decoded between loads.
+	"""
+	VERSION: int = 1
+
+	entries: dict[str, dict] = {}
+	keep_sheets: int = 2		# How many of the most recently used sheets to keep decoded until `release_sheets` (one state's loads come back to back)
+
+	# Decoded sheets, shared by every load that uses them (and dropped once nothing does anymore)
+	_sheets: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+	_recent: OrderedDict[str, Image.Image] = OrderedDict()
+	_sheets_lock = threading.Lock()
+
+
+	#======== Runtime ========#
+
+	@classmethod
+	def load_index(cls, index_path: str) -> bool:
+		"""
+		Loads a sheet index written by `build` (from the mounted asset archive if it's packed in there).
+
+		Args:
+			`index_path` (str): The file path to the index.
+		Returns:
+			`bool`: Whether the index could be loaded.
+		"""
+		packed = AssetPack.read(index_path)
+		try:
+			if packed != None:
+				index = json.loads(bytes(packed).decode("utf-8"))
+			else:
+				with open(index_path, "r", encoding = "utf-8") as f:
+					index = json.load(f)
+		except FileNotFoundError:
+			return False
+		if index.get("version") != cls.VERSION:
+			return False
+		cls.entries = index["images"]
+		return True
+
+
+	@classmethod
+	def lookup(cls, image_path: str) -> dict | None:
+		"""
+		Returns:
+			`dict | None`: Where an image got packed, or None if it wasn't (or if its file changed since it was packed).
+		"""
+		entry = cls.entries.get(normalize_path(image_path))
+		if entry == None:
+			return None
+		# Loose files that were edited since packing win over their stale packed copy (if they aren't around at all, trust the index)
+		if AssetPack.entry(image_path) == None and os.path.exists(image_path) and source_mtimes(image_path) != entry["mtimes"]:
+			return None
+		return entry
+
+
+	@classmethod
+	def sheet_image(cls, sheet_path: str) -> Image.Image:
+		"""
+		Returns the decoded (RGBA) image of a packed sheet, decoding it only if no one else is using it right now.
+		"""
+		with cls._sheets_lock:
+			sheet = cls._sheets.get(sheet_path)
+			if sheet == None:
+				packed = AssetPack.read(sheet_path)
+				sheet = Image.open(io.BytesIO(packed) if packed != None else sheet_path).convert("RGBA")
+				cls._sheets[sheet_path] = sheet
+			# Loads usually come in a row (a state's setup or preload), so keep the last few sheets around for the next one
+			cls._recent[sheet_path] = sheet
+			cls._recent.move_to_end(sheet_path)
+			while len(cls._recent) > cls.keep_sheets:
+				cls._recent.popitem(last = False)
+			return sheet
+
+
+	@classmethod
+	def release_sheets(cls) -> None:
+		"""Stops keeping recently used sheets decoded (atlases that still need to slice frames keep theirs)."""
+		with cls._sheets_lock:
+			cls._recent.clear()
+
+
+	#======== Building ========#
+
+	@classmethod
+	def pack(cls, image_paths: list[str], out_dir: str, name: str, max_size: int = 4096, padding: int = 2) -> dict[str, dict]:
+		"""
+		Packs a bunch of images into as few sheets as possible, writing every sheet as `<name><n>.png` + `<name><n>.xml`. \n
+		Atlases get their distinct frames packed on their own (held frames still share a region), and all the frames of
+		an image always end up in the same sheet. Images with a frame that can't fit in a sheet at all are left out.
+
+		Args:
+			`image_paths` (list[str]): The images to pack (static images or spritesheets with an XML next to them).
+			`out_dir` (str): Where to write the sheets.
+			`name` (str): The base name of the sheets.
+			`max_size` (int): The maximum width and height of a sheet.
+			`padding` (int): How many transparent pixels to leave between frames (so filtering doesn't bleed neighbours in).
+		Returns:
+			`dict[str, dict]`: The index entries of every packed image (see `entries`).
+		"""
+		from AssetManager import parse_xml_atlas
+
+		sources = []
+		for image_path in dict.fromkeys(normalize_path(path) for path in image_paths):
+			xml_path = image_path.rsplit('.', 1)[0] + '.xml'
+			if os.path.exists(xml_path):
+				names, rects, frames = parse_xml_atlas(xml_path)
+			else:
+				with Image.open(image_path) as image:
+					w, h = image.size
+				names, rects, frames = [os.path.splitext(os.path.basename(image_path))[0]], [(0, 0, w, h)], [0, 0, w, h]
+			unique_rects = list(dict.fromkeys(rects))
+			if any(w + padding > max_size or h + padding > max_size for _, _, w, h in unique_rects):
+				print(f"Skipping {image_path}: it has a frame bigger than {max_size}x{max_size}")
+				continue
+			sources.append((image_path, names, rects, list(frames), unique_rects))
+
+		# Biggest images first, and tallest frames first within an image: that's what skylines like
+		sources.sort(key = lambda source: -sum(w * h for _, _, w, h in source[4]))
+		sheets: list[Skyline] = []
+		placements: list[list[tuple]] = []		# sheet -> (source, {source rect: packed position})
+		for source in sources:
+			for sheet_index in range(len(sheets) + 1):
+				if sheet_index == len(sheets):
+					sheets.append(Skyline(max_size, max_size))
+					placements.append([])
+				sheet = sheets[sheet_index]
+				snapshot = sheet.snapshot()
+				positions = {}
+				for rect in sorted(source[4], key = lambda rect: (-rect[3], -rect[2])):
+					position = sheet.insert(rect[2] + padding, rect[3] + padding)
+					if position == None:
+						break
+					positions[rect] = position
+				if len(positions) == len(source[4]):
+					placements[sheet_index].append((source, positions))
+					break
+				sheet.restore(snapshot)		# Doesn't fit, try the next sheet (all frames of an image stay together)
+
+		os.makedirs(out_dir, exist_ok = True)
+		entries = {}
+		for sheet_index, (sheet, placed) in enumerate(zip(sheets, placements)):
+			sheet_name = f"{name}{sheet_index}"
+			sheet_path = normalize_path(os.path.join(out_dir, sheet_name + ".png"))
+			sheet_image = Image.new("RGBA", (max(sheet.used_width, 1), max(sheet.used_height, 1)))
+			atlas = ET.Element("TextureAtlas", imagePath = sheet_name + ".png")
+
+			for (image_path, names, rects, frames, _), positions in placed:
+				with Image.open(image_path) as image:
+					image = image.convert("RGBA")
+					for (x, y, w, h), (px, py) in positions.items():
+						sheet_image.paste(image.crop((x, y, x + w, y + h)), (px, py))
+
+				packed_rects = []
+				for i, (frame_name, rect) in enumerate(zip(names, rects)):
+					px, py = positions[rect]
+					w, h = rect[2], rect[3]
+					packed_rects.append((px, py, w, h))
+					attrib = {"name": frame_name, "x": str(px), "y": str(py), "width": str(w), "height": str(h)}
+					frame_x, frame_y, frame_w, frame_h = frames[4 * i : 4 * i + 4]
+					if (frame_x, frame_y, frame_w, frame_h) != (0, 0, w, h):
+						attrib.update(frameX = str(frame_x), frameY = str(frame_y), frameWidth = str(frame_w), frameHeight = str(frame_h))
+					ET.SubElement(atlas, "SubTexture", attrib)
+
+				entries[image_path] = {
+					"sheet":  sheet_path,
+					"names":  names,
+					"rects":  packed_rects,
+					"frames": frames,
+					"mtimes": source_mtimes(image_path),
+				}
+
+			sheet_image.save(sheet_path)
+			ET.indent(atlas)
+			ET.ElementTree(atlas).write(sheet_path.rsplit('.', 1)[0] + '.xml', encoding = "utf-8", xml_declaration = True)
+			print(f"Packed {len(placed)} images into {sheet_path} ({sheet_image.width}x{sheet_image.height})")
+		return entries
+
+
+	@classmethod
+	def build(cls, out_dir: str, max_size: int = 4096, padding: int = 2) -> dict[str, dict]:
+		"""
+		Packs the images of every state's `preload_manifest` into its own sheets (named after the state), and writes the index.
+		An image declared by more than one state only gets packed for the first one.
+
+		Args:
+			`out_dir` (str): Where to write the sheets and the index.
+			`max_size` (int): The maximum width and height of a sheet.
+			`padding` (int): How many transparent pixels to leave between frames.
+		Returns:
+			`dict[str, dict]`: The index entries of every packed image.
+		"""
+		from StateManager import State
+		import states
+
+		entries: dict[str, dict] = {}
+		for module_info in sorted(pkgutil.iter_modules(states.__path__), key = lambda info: info.name):
+			module = importlib.import_module(f"states.{module_info.name}")
+			for state_class in vars(module).values():
+				if not (isinstance(state_class, type) and issubclass(state_class, State) and state_class.__module__ == module.__name__):
+					continue
+				manifest = state_class.preload_manifest or {}
+				image_paths = [entry[0] if isinstance(entry, tuple) else entry for entry in manifest.get("images", {}).values()]
+				image_paths = [path for path in image_paths if normalize_path(path) not in entries]
+				if image_paths:
+					entries.update(cls.pack(image_paths, out_dir, state_class.__name__, max_size, padding))
+
+		with open(os.path.join(out_dir, INDEX_FILE), "w", encoding = "utf-8") as f:
+			json.dump({"version": cls.VERSION, "images": entries}, f, indent = "\t")
+		return entries
+
+
+
+def source_mtimes(image_path: str) -> list[int]:
+	"""Returns the modification times of an image and its XML (0 if there's none), to tell if a packed copy went stale."""
+	xml_path = image_path.rsplit('.', 1)[0] + '.xml'
+	return [os.stat(image_path).st_mtime_ns, os.stat(xml_path).st_mtime_ns if os.path.exists(xml_path) else 0]
+
+
+
+if __name__ == "__main__":
+	out_dir = sys.argv[1] if len(sys.argv) > 1 else "assets/packed"
+	entries = SpritePacker.build(out_dir)
+	print(f"Wrote the index of {len(entries)} packed images to {os.path.join(out_dir, INDEX_FILE)}")
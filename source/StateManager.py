@@ -6,6 +6,8 @@
 
 import arcade as arc
 import utils
+from AssetManager import AssetManager
+from SpritePacker import SpritePacker
 
 
 ###============ State Class ============###
@@ -13,7 +15,15 @@ import utils
 class State(arc.View):
 	"""
 	Represents a game state.
+	Attributes:
+		`preload_manifest` (dict[str, dict[str, str | tuple[str, dict]]] | None): Assets to start loading in the background as soon as the state is registered (see `AssetManager.preload`).
+		`unload_on_exit` (bool): Whether to release the state's assets when switching away from it (see `unload`). The state then gets set up again the next time it's shown.
+	
+	Every asset loaded in `setup()` is tied to the state (see `AssetManager.scoped`).
 	"""
+	preload_manifest: dict[str, dict[str, str | tuple[str, dict]]] = None
+	unload_on_exit: bool = False
+
 	def __init__(self, window: arc.Window = None) -> None:
 		super().__init__(window, background_color = arc.color.BLACK)
 		self.loaded				= False
@@ -36,6 +46,13 @@ class State(arc.View):
 		"""Used when the state loads for the first time."""
 		pass
 
+	def unload(self) -> None:
+		"""
+		Used when the state's assets get released (`unload_on_exit` states only, right after switching away from them).
+		Drop every reference to them here so they can actually be freed, `setup()` loads them again the next time the state is shown.
+		"""
+		pass
+
 	# --- Substate managing (yes, each state does it) ---
 
 	def set_substate(self, substate: "Substate") -> None:
@@ -64,6 +81,28 @@ class State(arc.View):
 
 	def step_hit(self) -> None:
 		"""Runs when the Conductor reaches a new step."""
+
+	# --- Hot reloading ---
+
+	def swap_textures(self, swaps: dict[arc.Texture, arc.Texture]) -> None:
+		"""
+		Points the state's sprites at reloaded textures (see `AssetManager.reload_changed`). \n
+		This covers every `Sprite` and `SpriteList` stored on the state, so override it if some are kept elsewhere.
+
+		Args:
+			`swaps` (dict[arc.Texture, arc.Texture]): old texture -> new texture.
+		"""
+		for value in list(vars(self).values()):
+			if isinstance(value, arc.Sprite):
+				sprites = [value]
+			elif isinstance(value, arc.SpriteList):
+				sprites = value
+			else:
+				continue
+			for sprite in sprites:
+				new_texture = swaps.get(sprite.texture)
+				if new_texture != None:
+					sprite.texture = new_texture
 	
 	# --- State/Substate logic (and Arcade) ---
 
@@ -115,6 +154,7 @@ class StateManager:
 	all_states: dict[str, State]	= {}
 	substate_stack: list[Substate]	= []
 	current_state: State         = None
+	current_state_name: str      = None
 	window: arc.Window           = None
 
 
@@ -139,6 +179,10 @@ class StateManager:
 		if cls.all_states.get(name) != None:
 			return
 		cls.all_states[name] = state
+		# Get a head start on the state's assets so `setup()` doesn't have to load them all on the spot
+		if state.preload_manifest:
+			with AssetManager.scoped(name):
+				AssetManager.preload(state.preload_manifest)
 	
 
 	@classmethod
@@ -152,12 +196,18 @@ class StateManager:
 		if not new_state:
 			return
 		
-		if cls.current_state != None:
-			cls.current_state.exit()
+		old_state, old_name = cls.current_state, cls.current_state_name
+		if old_state != None:
+			old_state.exit()
 
 		cls.current_state = new_state
+		cls.current_state_name = name
 		if not cls.current_state.loaded:
-			cls.current_state.setup()
+			# Tie everything the state loads to it
+			with AssetManager.scoped(name):
+				cls.current_state.setup()
+			# Done slicing for now, so the shared spritesheets don't need to stay decoded
+			SpritePacker.release_sheets()
 
 		cls.current_state.enter()
 		cls.window.show_view(cls.current_state)
@@ -165,6 +215,28 @@ class StateManager:
 		if not cls.current_state.loaded:
 			cls.current_state.loaded = True   # so we don't set it up again
 
+		# Let go of the old state's assets only now, so the ones the new state shares with it don't get evicted and reloaded
+		if old_state != None and old_state is not new_state and old_state.unload_on_exit:
+			old_state.loaded = False
+			old_state.unload()
+			AssetManager.release_scope(old_name)
+
+	
+	@classmethod
+	def swap_textures(cls, swaps: dict[arc.Texture, arc.Texture]) -> None:
+		"""
+		Points the sprites of every loaded state (and substate) at reloaded textures (see `State.swap_textures`).
+		Args:
+			`swaps` (dict[arc.Texture, arc.Texture]): old texture -> new texture.
+		"""
+		if not swaps:
+			return
+		for state in cls.all_states.values():
+			if state.loaded:
+				state.swap_textures(swaps)
+				if state.substate:
+					state.substate.swap_textures(swaps)
+
 	
 	###=============== TRANSITIONS ===============###
 
@@ -0,0 +1,94 @@
+# Friday Night Funkin' Astral Engine
+
+### Tempo Map
+# This module handles songs whose BPM changes mid-song.
+# A tempo map is a sorted list of change points (when the change happens, the new BPM, and how many beats came before it),
+# stored in flat arrays so that converting between time and beats is just a binary search plus one multiplication.
+
+from array import array
+from bisect import bisect_right
+
+
+class TempoMap:
+	"""
+	A song's BPM changes, and the math to convert between song time and beats with them.
+	Attributes:
+		`times` (array): When every change happens, in seconds (sorted, the first one is always at 0).
+		`bpms` (array): The BPM from every change on.
+		`beats` (array): The beat every change happens on (the beats before it add up through every earlier BPM).
+	"""
+	def __init__(self, bpm: float) -> None:
+		self.times = array("d", [0.0])
+		self.bpms  = array("d", [bpm])
+		self.beats = array("d", [0.0])
+
+	@staticmethod
+	def from_changes(changes: list[tuple[float, float]], in_beats: bool = False) -> "TempoMap":
+		"""
+		Builds a tempo map from a list of BPM changes.
+
+		Args:
+			`changes` (list[tuple[float, float]]): `(position, bpm)` pairs, the first one being the song's starting BPM (its position is ignored).
+			`in_beats` (bool): Whether the positions are in beats (like charts usually have them) instead of seconds.
+		Returns:
+			`TempoMap`: The tempo map.
+		"""
+		changes = sorted(changes)
+		tempo_map = TempoMap(changes[0][1])
+		for position, bpm in changes[1:]:
+			if in_beats:
+				position = tempo_map.time_at(position)
+			tempo_map.add_change(position, bpm)
+		return tempo_map
+
+	def add_change(self, time: float, bpm: float) -> None:
+		"""
+		Changes the BPM from `time` (in seconds) on. The beats of every later change are worked out again.
+		"""
+		if time <= 0:
+			self.bpms[0] = bpm
+			index = 0
+		else:
+			index = bisect_right(self.times, time)
+			if self.times[index - 1] == time:
+				index -= 1
+				self.bpms[index] = bpm
+			else:
+				self.times.insert(index, time)
+				self.bpms.insert(index, bpm)
+				self.beats.insert(index, 0.0)
+		# Everything after the change moved
+		for i in range(max(index, 1), len(self.times)):
+			self.beats[i] = self.beats[i - 1] + (self.times[i] - self.times[i - 1]) * self.bpms[i - 1] / 60
+
+	def __len__(self) -> int:
+		return len(self.times)
+
+
+	#======== Lookups ========#
+
+	def change_index_at(self, time: float) -> int:
+		"""Returns the index of the change that's active at `time` (in seconds)."""
+		return max(bisect_right(self.times, time) - 1, 0)
+
+	def bpm_at(self, time: float) -> float:
+		"""Returns the BPM at `time` (in seconds)."""
+		return self.bpms[self.change_index_at(time)]
+
+	def beat_at(self, time: float) -> float:
+		"""Returns the (fractional) beat at `time` (in seconds). Times before the song starts give negative beats."""
+		i = self.change_index_at(time)
+		return self.beats[i] + (time - self.times[i]) * self.bpms[i] / 60
+
+	def step_at(self, time: float) -> float:
+		"""Returns the (fractional) step at `time` (in seconds)."""
+		return self.beat_at(time) * 4
+
+	def time_at(self, beat: float) -> float:
+		"""Returns when the (fractional) `beat` happens, in seconds."""
+		i = max(bisect_right(self.beats, beat) - 1, 0)
+		return self.times[i] + (beat - self.beats[i]) * 60 / self.bpms[i]
+
+	def time_at_step(self, step: float) -> float:
+		"""Returns when the (fractional) `step` happens, in seconds."""
+		return self.time_at(step / 4)
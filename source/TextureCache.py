@@ -0,0 +1,214 @@
+# Friday Night Funkin' Astral Engine
+
+### Texture Cache
+# This module handles the persistent, on-disk cache of decoded (and processed) textures.
+# Every entry is a raw RGBA dump of an image asset's final texture(s), so the next launch can memory-map it straight
+# into textures instead of decoding the PNG and re-running all the PIL processing.
+
+import arcade as arc
+from PIL import Image
+from array import array
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from AssetPack import AssetPack
+
+
+# Entry layout (little endian):
+#   header:       magic, version, is_atlas, frame count, region count
+#   frame table:  frame count    * uint32  (region index of each frame)
+#   offsets:      frame count    * float32 x/y pairs (draw offset of each trimmed frame, atlases only)
+#   region table: region count   * (width, height, pixel offset, hit box offset, hit box point count)
+#   hit boxes:    float32 x/y pairs of every region's hit box
+#   pixels:       raw RGBA of every region, back to back
+HEADER = struct.Struct("<4sIIII")
+REGION = struct.Struct("<IIQII")
+MAGIC  = b"ASTC"
+
+
+class TextureCache:
+	"""
+	The persistent texture cache. Entries are keyed by (source file, modification time, transform chain). \n
+	Entry files are named `<source key>-<entry key>.rgba`, the source key leaving the modification time out, so that writing
+	a new entry can throw away the ones left from older versions of the same file (which would pile up with every edit otherwise).
+	Attributes:
+		`enabled` (bool): Whether the cache is used at all. Can be turned off with the `ASTRAL_TEXTURE_CACHE=0` environment variable.
+		`directory` (str): Where the cache entries are stored.
+	"""
+	VERSION: int = 6		# Bump this whenever the entry layout (or the way transforms are applied) changes
+
+	enabled: bool = os.environ.get("ASTRAL_TEXTURE_CACHE", "1") != "0"
+	directory: str = ".astral_cache/textures"
+
+
+	@classmethod
+	def entry_key(cls, image_path: str, transforms: tuple) -> str | None:
+		"""
+		Computes the cache key of an image with a transform chain applied.
+
+		Args:
+			`image_path` (str): The file path to the image.
+			`transforms` (tuple): The transform chain, as `(name, value)` pairs.
+		Returns:
+			`str | None`: The cache key, or None if the image doesn't exist.
+		"""
+		# Packed images (and their precompiled atlas index) already come with content hashes
+		packed = AssetPack.entry(image_path)
+		if packed != None:
+			key = f"{cls.VERSION}|pack|{packed['sha1']}|{packed.get('atlas', {}).get('sha1', '')}|{transforms!r}"
+			return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+		try:
+			image_mtime = os.stat(image_path).st_mtime_ns
+		except FileNotFoundError:
+			return None
+		# The atlas XML is part of the source too
+		try:
+			xml_mtime = os.stat(image_path.rsplit('.', 1)[0] + '.xml').st_mtime_ns
+		except FileNotFoundError:
+			xml_mtime = 0
+
+		key = f"{cls.VERSION}|{os.path.abspath(image_path)}|{image_mtime}|{xml_mtime}|{transforms!r}"
+		return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+	@staticmethod
+	def source_key(image_path: str, transforms: tuple) -> str:
+		"""Returns the key shared by every cache entry of an image and transform chain, whatever version of the image they're of."""
+		key = f"{os.path.abspath(image_path)}|{transforms!r}"
+		return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+	@classmethod
+	def entry_path(cls, image_path: str, transforms: tuple, key: str) -> str:
+		return os.path.join(cls.directory, f"{cls.source_key(image_path, transforms)}-{key}.rgba")
+
+
+	@classmethod
+	def read(cls, image_path: str, transforms: tuple) -> tuple[arc.Texture | list[arc.Texture], array | None] | None:
+		"""
+		Maps a cached texture (or atlas frame list) straight from disk.
+
+		Args:
+			`image_path` (str): The file path to the image.
+			`transforms` (tuple): The transform chain, as `(name, value)` pairs.
+		Returns:
+			`tuple[arc.Texture | list[arc.Texture], array | None] | None`: The cached texture(s) and atlas frame offsets, or None on a cache miss.
+		"""
+		if not cls.enabled:
+			return None
+		key = cls.entry_key(image_path, transforms)
+		if key == None:
+			return None
+		try:
+			with open(cls.entry_path(image_path, transforms, key), "rb") as f:
+				data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+		except (FileNotFoundError, ValueError):
+			return None
+
+		magic, version, is_atlas, frame_count, region_count = HEADER.unpack_from(data, 0)
+		if magic != MAGIC or version != cls.VERSION:
+			return None
+
+		offset = HEADER.size
+		frame_table = array("I")
+		frame_table.frombytes(data[offset : offset + 4 * frame_count])
+		offset += 4 * frame_count
+
+		frame_offsets = None
+		if is_atlas:
+			frame_offsets = array("f")
+			frame_offsets.frombytes(data[offset : offset + 8 * frame_count])
+			offset += 8 * frame_count
+
+		regions = [REGION.unpack_from(data, offset + i * REGION.size) for i in range(region_count)]
+		offset += REGION.size * region_count
+
+		point_count = sum(region[4] for region in regions)
+		hit_boxes = array("f")
+		hit_boxes.frombytes(data[offset : offset + 8 * point_count])
+
+		textures = []
+		for i, (w, h, pixel_offset, hb_offset, hb_count) in enumerate(regions):
+			# `frombuffer` maps the pixels without copying them, and passing the hit box and hash skips arcade recomputing them
+			image = Image.frombuffer("RGBA", (w, h), memoryview(data)[pixel_offset : pixel_offset + w * h * 4], "raw", "RGBA", 0, 1)
+			points = tuple(zip(hit_boxes[2 * hb_offset : 2 * (hb_offset + hb_count) : 2], hit_boxes[2 * hb_offset + 1 : 2 * (hb_offset + hb_count) : 2]))
+			textures.append(arc.Texture(image, hit_box_points = points, hash = f"{key}:{i}"))
+
+		if not is_atlas:
+			return textures[0], None
+		return [textures[region] for region in frame_table], frame_offsets
+
+
+	@classmethod
+	def write(cls, image_path: str, transforms: tuple, texture: arc.Texture | list[arc.Texture], offsets: array | None = None) -> None:
+		"""
+		Stores an image asset's final texture(s) in the cache.
+
+		Args:
+			`image_path` (str): The file path to the image.
+			`transforms` (tuple): The transform chain, as `(name, value)` pairs.
+			`texture` (arc.Texture | list[arc.Texture]): The texture (or atlas frames) to store.
+			`offsets` (array | None): The atlas frame offsets (see `ImageAsset.offsets`).
+		"""
+		if not cls.enabled:
+			return
+		key = cls.entry_key(image_path, transforms)
+		if key == None:
+			return
+
+		is_atlas = not isinstance(texture, arc.Texture)
+		frames = list(texture) if is_atlas else [texture]
+
+		# Frames sharing a texture share a region too
+		region_textures: list[arc.Texture] = []
+		region_index: dict[int, int] = {}
+		frame_table = array("I")
+		for tex in frames:
+			if id(tex) not in region_index:
+				region_index[id(tex)] = len(region_textures)
+				region_textures.append(tex)
+			frame_table.append(region_index[id(tex)])
+
+		if is_atlas and offsets == None:
+			offsets = array("f", bytes(8 * len(frames)))
+
+		hit_boxes = array("f")
+		pixels: list[bytes] = []
+		region_records = []
+		pixel_offset = HEADER.size + 4 * len(frame_table) + (8 * len(frame_table) if is_atlas else 0) + REGION.size * len(region_textures)
+		pixel_offset += 8 * sum(len(tex.hit_box_points) for tex in region_textures)
+		for tex in region_textures:
+			image = tex.image if tex.image.mode == "RGBA" else tex.image.convert("RGBA")
+			region_records.append((image.width, image.height, pixel_offset, len(hit_boxes) // 2, len(tex.hit_box_points)))
+			for x, y in tex.hit_box_points:
+				hit_boxes.extend((x, y))
+			pixels.append(image.tobytes())
+			pixel_offset += len(pixels[-1])
+
+		os.makedirs(cls.directory, exist_ok = True)
+		# Write to a temporary file first so a half-written entry never gets mapped
+		final_path = cls.entry_path(image_path, transforms, key)
+		temp_path  = f"{final_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+		with open(temp_path, "wb") as f:
+			f.write(HEADER.pack(MAGIC, cls.VERSION, int(is_atlas), len(frame_table), len(region_textures)))
+			f.write(frame_table.tobytes())
+			if is_atlas:
+				f.write(offsets.tobytes())
+			for record in region_records:
+				f.write(REGION.pack(*record))
+			f.write(hit_boxes.tobytes())
+			for chunk in pixels:
+				f.write(chunk)
+		os.replace(temp_path, final_path)
+
+		# The older versions of this image won't ever be read again (and neither will entries from before they were named like this)
+		prefix = cls.source_key(image_path, transforms) + "-"
+		for name in os.listdir(cls.directory):
+			stale = name.startswith(prefix) or "-" not in name
+			if stale and name.endswith(".rgba") and name != os.path.basename(final_path):
+				try:
+					os.remove(os.path.join(cls.directory, name))
+				except OSError:
+					pass		# Still mapped somewhere (Windows won't delete those), it'll go next time
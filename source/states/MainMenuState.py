@@ -12,6 +12,18 @@ import math
 
 
 class MainMenuState(State):
+	# Load everything while the title screen is still up
+	preload_manifest = {
+		"images": {
+			"mainMenu/background": ("assets/images/MainMenu/menuBG.png",    {"brightness": 0.8}),
+			"mainMenu/storyMode":  ("assets/images/MainMenu/storymode.png", {"lazy": True}),
+			"mainMenu/freeplay":   ("assets/images/MainMenu/freeplay.png",  {"lazy": True}),
+			"mainMenu/options":    ("assets/images/MainMenu/options.png",   {"lazy": True}),
+		},
+	}
+	# We're cheap to set up again, so don't keep our assets around while we're not shown
+	unload_on_exit = True
+
 	def __init__(self, window: arc.Window, inp_mgr: InputManager):
 		super().__init__(window)
 		self.input_manager = inp_mgr
@@ -19,10 +31,11 @@ class MainMenuState(State):
 	def setup(self):
 		super().setup()
 		
-		self.menu_bg       = AssetManager.load_image("mainMenu/background", "assets/images/MainMenu/menuBG.png").apply_brightness(0.8)
-		self.storymode_img = AssetManager.load_image("mainMenu/storyMode", "assets/images/MainMenu/storymode.png")
-		self.freeplay_img  = AssetManager.load_image("mainMenu/freeplay",  "assets/images/MainMenu/freeplay.png")
-		self.options_img   = AssetManager.load_image("mainMenu/options",   "assets/images/MainMenu/options.png")
+		self.menu_bg       = AssetManager.load_image("mainMenu/background", "assets/images/MainMenu/menuBG.png", brightness = 0.8)
+		# The buttons only ever show their first 3 frames, so slice them lazily
+		self.storymode_img = AssetManager.load_image("mainMenu/storyMode", "assets/images/MainMenu/storymode.png", lazy = True)
+		self.freeplay_img  = AssetManager.load_image("mainMenu/freeplay",  "assets/images/MainMenu/freeplay.png",  lazy = True)
+		self.options_img   = AssetManager.load_image("mainMenu/options",   "assets/images/MainMenu/options.png",   lazy = True)
 
 		self.btn_texture_index = 0
 		self.option_index      = 0
@@ -41,6 +54,13 @@ class MainMenuState(State):
 		self.btn_sprites.append(self.options_spr)
 	
 
+	def unload(self):
+		# Drop our references so the assets can actually be freed (`setup()` loads them again next time)
+		self.menu_bg = self.storymode_img = self.freeplay_img = self.options_img = None
+		self.storymode_spr = self.freeplay_spr = self.options_spr = None
+		self.btn_sprites = None
+	
+
 	def draw(self):
 		self.clear()
 		self._world_camera.use()
@@ -60,22 +80,22 @@ class MainMenuState(State):
 		# Move the camera (in 0.125s) -- I fucking hate immutable vectors bruh
 		self._world_camera.position += arc.Vec2(0, cam_delta)
 
-		self.storymode_spr.texture = self.storymode_img.texture[math.floor(self.btn_texture_index) % 3]
-		self.freeplay_spr.texture  = self.freeplay_img.texture[math.floor(self.btn_texture_index) % 3]
-		self.options_spr.texture   = self.options_img.texture[math.floor(self.btn_texture_index) % 3]
+		set_sprite_frame(self.storymode_spr, self.storymode_img, math.floor(self.btn_texture_index) % 3, 0,  200)
+		set_sprite_frame(self.freeplay_spr,  self.freeplay_img,  math.floor(self.btn_texture_index) % 3, 0,    0)
+		set_sprite_frame(self.options_spr,   self.options_img,   math.floor(self.btn_texture_index) % 3, 0, -200)
 	
-		for event in self.input_manager.poll():
-			if event.act_type == InputEvent.Pressed and event.action == Keybind.Return:
-				StateManager.show_state("title")
-			
-			if event.act_type == InputEvent.Pressed and event.action == Keybind.Up:
-				# Update the option only if we have what to set it to
-				if self.option_index < 1:
-					self.target_cam_y += 200
-					self.option_index += 1
-			
-			if event.act_type == InputEvent.Pressed and event.action == Keybind.Down:
-				# Do the same here
-				if self.option_index > -1:
-					self.target_cam_y -= 200
-					self.option_index -= 1
+		if self.input_manager.just_pressed(Keybind.Return):
+			StateManager.show_state("title")
+			return
+		
+		if self.input_manager.just_pressed(Keybind.Up):
+			# Update the option only if we have what to set it to
+			if self.option_index < 1:
+				self.target_cam_y += 200
+				self.option_index += 1
+		
+		if self.input_manager.just_pressed(Keybind.Down):
+			# Do the same here
+			if self.option_index > -1:
+				self.target_cam_y -= 200
+				self.option_index -= 1
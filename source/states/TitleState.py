@@ -35,6 +35,27 @@ class TitleState(State):
 	MENU_TEXT_CONFIRM_SIZE: float = 40      # The size the menu text grows towards when pressing [Accept]
 	CAM_CONFIRM_TARGET_ZOOM: float = 0.9    # The zoom towards which the camera eases when pressing [Accept]
 
+	#====== Assets ======#
+
+	# Start loading these in the background as soon as the state is registered (see `AssetManager.preload`)
+	preload_manifest = {
+		"images": {
+			"titleScreen/title":          ("assets/images/TitleMenu/logoBumpin.png",      {"scale": 0.8}),
+			"titleScreen/gf":             ("assets/images/TitleMenu/gfDanceTitle.png",    {"scale": 0.8}),
+			"titleScreen/stage-back":     ("assets/images/shared/stageback.png",          {"brightness": 0.4}),
+			"titleScreen/stage-curtains": ("assets/images/shared/stagecurtains.png",      {"brightness": 0.4}),
+			"titleScreen/stage-front":    ("assets/images/shared/stagefront.png",         {"brightness": 0.4}),
+			"titleScreen/ng-logo":        ("assets/images/TitleMenu/newgrounds_logo.png", {"scale": 0.75}),
+			"titleScreen/flashbang":      "assets/images/shared/flashbang.png",
+		},
+		"sounds": {
+			"titleScreen/music": ("assets/sounds/TitleMenu/freakyMenu.ogg", {"streaming": True}),
+		},
+		"text_files": {
+			"introText": "assets/introText.txt",
+		},
+	}
+
 	#====== Actual game logic ======#
 
 	def __init__(self, window: arc.Window, inp_mgr: InputManager, conductor: Conductor):
@@ -51,7 +72,7 @@ class TitleState(State):
 
 	def setup(self):
 		super().setup()
-		self.title_music = AssetManager.load_sound("titleScreen/music", "assets/sounds/TitleMenu/freakyMenu.ogg")
+		self.title_music = AssetManager.load_sound("titleScreen/music", "assets/sounds/TitleMenu/freakyMenu.ogg", streaming = True)  # Stream the music, it's long
 		self.conductor.load_audio(self.title_music, bpm_override = 102)
 
 		self.intro_line0, self.intro_line1 = get_random_intro_line().split('--')
@@ -65,18 +86,14 @@ class TitleState(State):
 		self.flash_group = arc.SpriteList()
 		self.ngl_group   = arc.SpriteList()
 
-		# load title screen assets
-		self.title_image  = AssetManager.load_image("titleScreen/title", "assets/images/TitleMenu/logoBumpin.png")   # Title Logo
-		self.gf_image     = AssetManager.load_image("titleScreen/gf",    "assets/images/TitleMenu/gfDanceTitle.png")  # Girlfriend on Speakers Image
+		# load title screen assets (scaled so they're not too big)
+		self.title_image  = AssetManager.load_image("titleScreen/title", "assets/images/TitleMenu/logoBumpin.png",   scale = 0.8)   # Title Logo
+		self.gf_image     = AssetManager.load_image("titleScreen/gf",    "assets/images/TitleMenu/gfDanceTitle.png", scale = 0.8)   # Girlfriend on Speakers Image
 		self.stage_images = [
-			AssetManager.load_image(f"titleScreen/stage-back",     f"assets/images/shared/stageback.png").apply_brightness(0.4),
-			AssetManager.load_image(f"titleScreen/stage-curtains", f"assets/images/shared/stagecurtains.png").apply_brightness(0.4),
-			AssetManager.load_image(f"titleScreen/stage-front",    f"assets/images/shared/stagefront.png").apply_brightness(0.4),
+			AssetManager.load_image(f"titleScreen/stage-back",     f"assets/images/shared/stageback.png",     brightness = 0.4),
+			AssetManager.load_image(f"titleScreen/stage-curtains", f"assets/images/shared/stagecurtains.png", brightness = 0.4),
+			AssetManager.load_image(f"titleScreen/stage-front",    f"assets/images/shared/stagefront.png",    brightness = 0.4),
 		]
-
-		# Scale the assets so they're not too big
-		self.title_image.apply_scale(0.8)
-		self.gf_image.apply_scale(0.8)
 		
 		# Intro shit (way too much WHY GOD WHY)
 		self.intro_timer = 0
@@ -98,7 +115,7 @@ class TitleState(State):
 		)
 
 
-		ng_logo_img = AssetManager.load_image("titleScreen/ng-logo", "assets/images/TitleMenu/newgrounds_logo.png").apply_scale(0.75)
+		ng_logo_img = AssetManager.load_image("titleScreen/ng-logo", "assets/images/TitleMenu/newgrounds_logo.png", scale = 0.75)
 		self.ng_logo = arc.Sprite(
 			ng_logo_img.texture, 
 			center_x = -40,     # Offset it a little to the left
@@ -134,10 +151,15 @@ class TitleState(State):
 		self.menu_text.font_size = self.MENU_TEXT_SIZE
 		self.menu_text.color     = self.MENU_TEXT_COL1
 		self._world_camera.zoom = 1
+		# Only listen for input while we're shown
+		self.input_manager.subscribe(Keybind.Return, InputEvent.Pressed, self._on_return)
+		self.input_manager.subscribe(Keybind.Accept, InputEvent.Pressed, self._on_accept)
 
 	
 	def exit(self):
 		self.accepted = False
+		self.input_manager.unsubscribe(Keybind.Return, InputEvent.Pressed, self._on_return)
+		self.input_manager.unsubscribe(Keybind.Accept, InputEvent.Pressed, self._on_accept)
 		super().exit()
 		
 
@@ -218,10 +240,10 @@ class TitleState(State):
 		draw_tex(self.stage_images[2].texture, 0, -400)  # Front
 
 		# Draw the girlfriend on speakers
-		draw_tex(self.gf_image.texture[math.floor(self.gf_animation_frame) % 30], 0, -230)
+		draw_frame(self.gf_image, math.floor(self.gf_animation_frame) % 30, 0, -230)
 
 		# Draw the logo
-		draw_tex(self.title_image.texture[math.floor(self.logo_animation_frame) % 15], 0, 140)
+		draw_frame(self.title_image, math.floor(self.logo_animation_frame) % 15, 0, 140)
 
 		# Draw the main text
 		self.menu_text.draw()
@@ -269,8 +291,7 @@ class TitleState(State):
 		# --- update beats ---
 		self._handle_beat(dt)
 
-		# --- input polling ---
-		self._handle_input()
+		# (input gets handled by `_on_return`/`_on_accept`, which the input manager calls)
 
 	
 	def _update_textures(self):
@@ -308,25 +329,21 @@ class TitleState(State):
 
 
 	def _handle_beat(self, dt):
-		# Check in with the conductor
-		beat_check, _ = self.conductor.update()
-		if beat_check:
-			self.beat_hit()
+		# Check in with the conductor (it calls `beat_hit()` for every beat we went past, even if the frame took longer than a beat)
+		self.conductor.update(self)
 		
 
-	def _handle_input(self):
-		for event in self.input_manager.poll():
-			if event.act_type == InputEvent.Pressed and event.action == Keybind.Return:
-				arc.exit()
-			
-			if event.act_type == InputEvent.Pressed and event.action == Keybind.Accept:
-				if not self.intro_finished:
-					self.intro_finished = True
-					self.beat = 16
-				elif not self.accepted:
-					self.playConfirm()
-					self.accepted = True
-					self.confirm_timer = 0.0
+	def _on_return(self, event):
+		arc.exit()
+
+	def _on_accept(self, event):
+		if not self.intro_finished:
+			self.intro_finished = True
+			self.beat = 16
+		elif not self.accepted:
+			self.playConfirm()
+			self.accepted = True
+			self.confirm_timer = 0.0
 	
 
 	def playConfirm(self):
@@ -11,6 +11,18 @@ def draw_tex(texture: arc.Texture, x: float, y: float, angle: float = 0):
 		),  angle = angle
 	)
 
+# ...and its atlas-aware sibling
+def draw_frame(image, index: int, x: float, y: float, angle: float = 0):
+	# Atlas frames are stored trimmed, so nudge each one to where it sits in its untrimmed frame
+	offset_x, offset_y = image.frame_offset(index)
+	draw_tex(image.texture[index], x + offset_x, y + offset_y, angle)
+
+def set_sprite_frame(sprite: arc.Sprite, image, index: int, x: float, y: float):
+	# Same thing, but for sprites
+	offset_x, offset_y = image.frame_offset(index)
+	sprite.texture  = image.texture[index]
+	sprite.position = (x + offset_x, y + offset_y)
+
 
 #====== Math stuff ======#
 